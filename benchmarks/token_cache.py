@@ -0,0 +1,60 @@
+"""
+Measures the per-request overhead of reading credentials from a slow
+AuthenticationStore (such as one backed by a database row), with and without
+the Authenticator's in-memory credential cache. Run it from the repository
+root:
+
+    $ PYTHONPATH=. python benchmarks/token_cache.py [store latency in ms] [requests]
+"""
+import sys
+import time
+
+from lingo24.business_documents.auth import Authenticator, DictAuthenticationStore
+
+
+class SlowAuthenticationStore(DictAuthenticationStore):
+    def __init__(self, latency, *args, **kwargs):
+        super(SlowAuthenticationStore, self).__init__(*args, **kwargs)
+        self.latency = latency
+        self.get_count = 0
+
+    def get(self):
+        self.get_count += 1
+        time.sleep(self.latency)
+        return super(SlowAuthenticationStore, self).get()
+
+
+def run(cache_credentials, latency, requests):
+    store = SlowAuthenticationStore(latency, {
+        'access_token': 'aaa',
+        'refresh_token': 'bbb',
+        'expires_at': time.time() + 3600,
+    })
+    authenticator = Authenticator(
+        'client-id',
+        'client-secret',
+        'https://www.example.com/callback',
+        store=store,
+        cache_credentials=cache_credentials,
+    )
+    started = time.time()
+    for _ in xrange(requests):
+        authenticator.access_token
+    elapsed = time.time() - started
+    return elapsed, store.get_count
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.001
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    for cache_credentials in (False, True):
+        elapsed, get_count = run(cache_credentials, latency, requests)
+        print '{:<20} {:>8.3f} ms/request {:>8} store reads'.format(
+            'cached' if cache_credentials else 'uncached',
+            elapsed * 1000 / requests,
+            get_count,
+        )
+
+
+if __name__ == '__main__':
+    main()
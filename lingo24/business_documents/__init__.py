@@ -1,2 +1,15 @@
-from .auth import Authenticator, AuthenticationStore
+from .auth import (
+    Authenticator,
+    AuthenticationStore,
+    DictAuthenticationStore,
+    FileAuthenticationStore,
+    SQLiteAuthenticationStore,
+    )
+from .async_client import AsyncClient
+from .cache import ResponseCache, SQLiteResponseCache
 from .client import Client
+from .content_cache import FileContentCache
+from .content_index import ContentIndex
+from .identity import IdentityMap
+from .ratelimit import FileTokenBucket, TokenBucket
+from .retry import RetryPolicy
@@ -0,0 +1,88 @@
+import threading
+from multiprocessing.pool import ThreadPool
+
+from .client import Client
+from .deadline import propagate_deadline
+
+
+class AsyncClient(Client):
+    """
+    A Client whose API requests can also be issued without blocking the
+    caller. Requests are run on a shared pool of `workers` threads, and each
+    `*_async` method returns an `AsyncResult`; calling its `get` method waits
+    for the response (re-raising any error from the request).
+    """
+    def __init__(self, authenticator, *args, **kwargs):
+        self.workers = kwargs.pop('workers', 10)
+        kwargs.setdefault('pool_maxsize', self.workers)
+        super(AsyncClient, self).__init__(authenticator, *args, **kwargs)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPool(self.workers)
+            return self._pool
+
+    def close(self):
+        """
+        Stop the worker threads. Requests which have not yet completed are
+        abandoned.
+        """
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run an arbitrary callable on the worker pool; for example, reading a
+        file's content with `client.submit(getattr, file_obj, 'content')`.
+        The call is subject to the caller's deadline, if any.
+        """
+        return self.pool.apply_async(propagate_deadline(func), args, kwargs)
+
+    def api_request_async(self, *args, **kwargs):
+        return self.submit(self.api_request, *args, **kwargs)
+
+    def api_get_async(self, *args, **kwargs):
+        return self.submit(self.api_get, *args, **kwargs)
+
+    def api_put_async(self, *args, **kwargs):
+        return self.submit(self.api_put, *args, **kwargs)
+
+    def api_post_async(self, *args, **kwargs):
+        return self.submit(self.api_post, *args, **kwargs)
+
+    def api_delete_async(self, *args, **kwargs):
+        return self.submit(self.api_delete, *args, **kwargs)
+
+    def api_get_json_async(self, *args, **kwargs):
+        return self.submit(self.api_get_json, *args, **kwargs)
+
+    def api_put_json_async(self, *args, **kwargs):
+        return self.submit(self.api_put_json, *args, **kwargs)
+
+    def api_post_json_async(self, *args, **kwargs):
+        return self.submit(self.api_post_json, *args, **kwargs)
+
+    def get_async(self, collection, item_id):
+        """
+        Fetch an item from an addressable collection, e.g.
+        `client.get_async(client.locales, 97)`.
+        """
+        return self.submit(collection.get, item_id)
+
+    def list_async(self, collection):
+        """
+        Fetch every item of an iterable collection into a list.
+        """
+        return self.submit(list, collection)
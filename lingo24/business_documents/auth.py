@@ -1,3 +1,8 @@
+import errno
+import json
+import os
+import tempfile
+import threading
 import time
 import urllib
 import urlparse
@@ -6,7 +11,10 @@ from email.utils import parsedate_tz, mktime_tz
 
 import requests
 
+from .deadline import limit_timeout
 from .endpoints import API_ENDPOINT_URLS, EASE_ENDPOINT_URLS
+from .locks import FileLock
+from .sqlite import connect_sqlite
 from ..exceptions import APIError, reraise
 
 
@@ -21,10 +29,22 @@ class AuthenticationStore(object):
     def set(self, value):
         pass  # pragma: no cover
 
+    def compare_and_set(self, expected, value):
+        """
+        Store `value` only if the current data equals `expected`, returning
+        whether it was stored. This default implementation is not atomic;
+        stores shared between processes should override it.
+        """
+        if self.get() != expected:
+            return False
+        self.set(value)
+        return True
+
 
 class DictAuthenticationStore(AuthenticationStore):
     def __init__(self, data=None):
         self.data = data or {}
+        self._lock = threading.Lock()
 
     def get(self):
         return self.data
@@ -32,15 +52,157 @@ class DictAuthenticationStore(AuthenticationStore):
     def set(self, value):
         self.data = value
 
+    def compare_and_set(self, expected, value):
+        with self._lock:
+            return super(DictAuthenticationStore, self).compare_and_set(expected, value)
+
+
+class FileAuthenticationStore(AuthenticationStore):
+    """
+    Persists the credential data as JSON in the file at `path`, readable only
+    by the current user. Writes replace the file atomically and are
+    serialised between processes using a lock file alongside it.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = FileLock('{}.lock'.format(path))
+
+    def get(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return json.load(f)
+        except IOError as exc:
+            if exc.errno == errno.ENOENT:
+                return {}
+            raise
+
+    def _write(self, value):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.lingo24-auth-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                json.dump(value, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.rename(temp_path, self.path)
+        except:
+            os.unlink(temp_path)
+            raise
+
+    def set(self, value):
+        with self._lock:
+            self._write(value)
+
+    def compare_and_set(self, expected, value):
+        with self._lock:
+            if self.get() != expected:
+                return False
+            self._write(value)
+            return True
+
+
+class SQLiteAuthenticationStore(AuthenticationStore):
+    """
+    Persists the credential data in a SQLite database (in WAL mode) at
+    `path`. Several sets of credentials can share a database by using
+    different `key` values.
+    """
+    def __init__(self, path, key='default', timeout=30):
+        self.path = path
+        self.key = key
+        self.timeout = timeout
+        connection = self._connect()
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS lingo24_auth '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return connect_sqlite(self.path, self.timeout)
+
+    def _read(self, connection):
+        row = connection.execute(
+            'SELECT value FROM lingo24_auth WHERE key = ?',
+            (self.key,),
+        ).fetchone()
+        if row is None:
+            return {}
+        return json.loads(row[0])
+
+    def _write(self, connection, value):
+        connection.execute(
+            'INSERT OR REPLACE INTO lingo24_auth (key, value) VALUES (?, ?)',
+            (self.key, json.dumps(value)),
+        )
+
+    def get(self):
+        connection = self._connect()
+        try:
+            return self._read(connection)
+        finally:
+            connection.close()
+
+    def set(self, value):
+        connection = self._connect()
+        try:
+            self._write(connection, value)
+        finally:
+            connection.close()
+
+    def compare_and_set(self, expected, value):
+        connection = self._connect()
+        try:
+            # Closing the connection rolls back any unfinished transaction.
+            connection.execute('BEGIN IMMEDIATE')
+            if self._read(connection) != expected:
+                connection.execute('ROLLBACK')
+                return False
+            self._write(connection, value)
+            connection.execute('COMMIT')
+            return True
+        finally:
+            connection.close()
+
 
 class Authenticator(object):
-    def __init__(self, client_id, client_secret, redirect_url, store=None, endpoint='live', endpoint_urls=None):
+    def __init__(self, client_id, client_secret, redirect_url, store=None, endpoint='live', endpoint_urls=None,
+                 session=None, refresh_lock=None, refresh_ahead=None, cache_credentials=False,
+                 connect_timeout=10, read_timeout=30):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_url = redirect_url
         if store is None:
             store = DictAuthenticationStore()
         self.store = store
+        # If enabled, the credential data is kept in memory and the store is
+        # only read again once the token expires or is rejected, or when
+        # `invalidate` is called. Writes always go through to the store.
+        self.cache_credentials = cache_credentials
+        self._cached_credentials = None
+        # An optional requests.Session (e.g. a Client's pooled `api_session`)
+        # through which OAuth2 requests are made.
+        self.session = session
+        # Seconds to wait for a connection to be established, and between
+        # bytes of a response, for OAuth2 requests (`None` waits forever).
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # Only one token refresh may be in flight at a time. A lock shared
+        # between processes (such as a FileLock) can be provided when the
+        # store is shared between processes.
+        if refresh_lock is None:
+            refresh_lock = threading.Lock()
+        self.refresh_lock = refresh_lock
+        # If set, the access token is refreshed in the background once it is
+        # within this many seconds of expiring.
+        self.refresh_ahead = refresh_ahead
+        self._background_refresh = None
+        self._background_refresh_lock = threading.Lock()
+        # The difference between the API server's clock and the local clock,
+        # taken from the Date header of the last OAuth2 response.
+        self.clock_offset = 0
         # endpoint_urls takes precedence
         if endpoint_urls:
             self.endpoint_urls = endpoint_urls
@@ -79,9 +241,14 @@ class Authenticator(object):
     @property
     def access_token(self):
         if self.access_token_expired:
-            self.refresh_access_token()
+            # Another process may already have refreshed the token.
+            self.invalidate()
+            if self.access_token_expired:
+                self.refresh_access_token(expired_token=self._credentials().get('access_token'))
+        elif self.refresh_ahead is not None and self.access_token_expiring:
+            self._refresh_in_background(self._credentials().get('access_token'))
         try:
-            return self.store.get()['access_token']
+            return self._credentials()['access_token']
         except KeyError:
             raise ValueError(
                 "No access token available. Ensure the authenticator's "
@@ -95,11 +262,78 @@ class Authenticator(object):
         Returns `True` if there is an access token in the store and it has
         expired; otherwise `False`.
         """
+        return self._expires_within(0)
+
+    @property
+    def access_token_expiring(self):
+        """
+        Returns `True` if there is an access token in the store and it will
+        expire within the `refresh_ahead` window; otherwise `False`.
+        """
+        return self._expires_within(self.refresh_ahead or 0)
+
+    def _expires_within(self, seconds):
         try:
-            expires_at = self.store.get()['expires_at']
+            expires_at = self._credentials()['expires_at']
         except KeyError:
             return False
-        return expires_at < time.time()
+        return expires_at < time.time() + self.clock_offset + seconds
+
+    def _refresh_in_background(self, expiring_token):
+        """
+        Start refreshing the access token in a background thread, unless a
+        background refresh is already running. Failures are ignored, as the
+        token will be refreshed in the foreground once it expires.
+        """
+        def refresh():
+            try:
+                self.refresh_access_token(expired_token=expiring_token)
+            except APIError:
+                pass
+            finally:
+                with self._background_refresh_lock:
+                    self._background_refresh = None
+
+        with self._background_refresh_lock:
+            if self._background_refresh is not None:
+                return
+            self._background_refresh = threading.Thread(target=refresh)
+            self._background_refresh.daemon = True
+            self._background_refresh.start()
+
+    def _credentials(self):
+        if not self.cache_credentials:
+            return self.store.get()
+        data = self._cached_credentials
+        if data is None:
+            data = self._cached_credentials = self.store.get()
+        return data
+
+    def _set_credentials(self, value):
+        self.store.set(value)
+        if self.cache_credentials:
+            self._cached_credentials = value
+
+    def _compare_and_set_credentials(self, expected, value):
+        compare_and_set = getattr(self.store, 'compare_and_set', None)
+        if compare_and_set is not None:
+            stored = compare_and_set(expected, value)
+        else:
+            # A custom store need only implement `get` and `set`, in which
+            # case the comparison can't be made atomically.
+            stored = self.store.get() == expected
+            if stored:
+                self.store.set(value)
+        if stored and self.cache_credentials:
+            self._cached_credentials = value
+        return stored
+
+    def invalidate(self):
+        """
+        Discard any cached credential data, so that it is next read from the
+        store.
+        """
+        self._cached_credentials = None
 
     def request_access_token(self, authorization_code):
         self._request_oauth2_access(
@@ -107,13 +341,33 @@ class Authenticator(object):
             code=authorization_code,
         )
 
-    def refresh_access_token(self):
-        self._request_oauth2_access(
-            grant_type='refresh_token',
-            refresh_token=self.store.get()['refresh_token'],
-        )
+    def refresh_access_token(self, expired_token=None):
+        """
+        Obtain a new access token using the stored refresh token.
 
-    def _request_oauth2_access(self, **kwargs):
+        Refreshes are single-flight: callers wait for any refresh already in
+        progress. If `expired_token` is given and the stored access token has
+        been replaced by the time this caller's turn comes, the new token is
+        used and no further refresh is made.
+        """
+        with self.refresh_lock:
+            self.invalidate()
+            data = self._credentials()
+            if expired_token is not None and data.get('access_token') != expired_token:
+                return
+            self._request_oauth2_access(
+                expected_credentials=data,
+                grant_type='refresh_token',
+                refresh_token=data['refresh_token'],
+            )
+
+    def _request_oauth2_access(self, expected_credentials=None, **kwargs):
+        """
+        Request an access token and save it in the store. If
+        `expected_credentials` is given, the new token is only saved if the
+        store still holds those credentials, so that a stale refresh can't
+        overwrite a newer token.
+        """
         query = urllib.urlencode(dict(
             client_id=self.client_id,
             client_secret=self.client_secret,
@@ -122,7 +376,8 @@ class Authenticator(object):
         ))
         url = urlparse.urljoin(self.api_endpoint_url, 'oauth2/access?{}'.format(query))
         try:
-            response = requests.post(url)
+            timeout = limit_timeout((self.connect_timeout, self.read_timeout))
+            response = (self.session or requests).post(url, timeout=timeout)
             response.raise_for_status()
         except requests.exceptions.RequestException:
             reraise(APIError)
@@ -130,10 +385,17 @@ class Authenticator(object):
             now = mktime_tz(parsedate_tz(response.headers['Date']))
         except (KeyError, TypeError):
             now = int(time.time())
+            self.clock_offset = 0
+        else:
+            self.clock_offset = now - time.time()
         json_response = response.json()
-        self.store.set({
+        credentials = {
             'access_token': json_response['access_token'],
             'refresh_token': json_response['refresh_token'],
             'expires_in': json_response['expires_in'],
             'expires_at': now + json_response['expires_in'],
-        })
+        }
+        if expected_credentials is None:
+            self._set_credentials(credentials)
+        elif not self._compare_and_set_credentials(expected_credentials, credentials):
+            self.invalidate()
@@ -0,0 +1,177 @@
+from __future__ import absolute_import
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .sqlite import connect_sqlite
+
+
+class ResponseCache(object):
+    """
+    An in-memory cache of parsed API responses, evicting the least recently
+    used entries once `max_entries` is reached.
+
+    Entries expire after `ttl` seconds; `ttls` can override this for
+    particular collections, keyed by their URL path (e.g.
+    `{'locales': 86400}`). A TTL of `None` means entries never expire. The
+    `hits` and `misses` counters record how effective the cache is.
+
+    If `stale_while_revalidate` is set, an expired entry is still returned
+    immediately, while a fresh copy is fetched in a background thread.
+    """
+    def __init__(self, max_entries=1000, ttl=3600, ttls=None, stale_while_revalidate=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.ttls = dict((namespace.strip('/'), t) for (namespace, t) in (ttls or {}).items())
+        self.hits = 0
+        self.misses = 0
+        self.stale_while_revalidate = stale_while_revalidate
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._revalidating = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, namespace):
+        return self.ttls.get(namespace.strip('/'), self.ttl)
+
+    def _lookup(self, key):
+        """
+        Returns a tuple of whether an entry exists for `key` (expired or
+        not), its value and when it was stored.
+        """
+        with self._lock:
+            try:
+                value, stored_at = self._entries.pop(key)
+            except KeyError:
+                return False, None, None
+            self._entries[key] = (value, stored_at)
+            return True, value, stored_at
+
+    def get(self, key, ttl=None):
+        """
+        Returns a tuple of whether an unexpired entry exists for `key`, and
+        its value.
+        """
+        found, value, stored_at = self._lookup(key)
+        if not found or (ttl is not None and stored_at + ttl < time.time()):
+            return False, None
+        return True, value
+
+    def set(self, key, value, stored_at=None):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, stored_at if stored_at is not None else time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def fetch(self, namespace, key, loader):
+        """
+        Returns the cached value for `key`, calling `loader` to obtain (and
+        cache) the value if there is no unexpired entry.
+        """
+        ttl = self.ttl_for(namespace)
+        found, value, stored_at = self._lookup(key)
+        fresh = found and (ttl is None or stored_at + ttl >= time.time())
+        stale = found and not fresh and self.stale_while_revalidate
+        with self._lock:
+            if fresh or stale:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if stale:
+            self._revalidate(key, loader)
+        if fresh or stale:
+            return value
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _revalidate(self, key, loader):
+        """
+        Refresh the entry for `key` in a background thread, unless it is
+        already being refreshed. If the refresh fails, the stale entry is
+        kept.
+        """
+        def revalidate():
+            try:
+                self.set(key, loader())
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        thread = threading.Thread(target=revalidate)
+        thread.daemon = True
+        thread.start()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    A ResponseCache which also persists its entries to a SQLite database at
+    `path`, so that they survive process restarts. Existing entries are
+    loaded when the cache is created; combined with `stale_while_revalidate`
+    (enabled by default) a new process can serve reference data without
+    waiting for any API requests.
+    """
+    def __init__(self, path, *args, **kwargs):
+        kwargs.setdefault('stale_while_revalidate', True)
+        super(SQLiteResponseCache, self).__init__(*args, **kwargs)
+        self.path = path
+        connection = self._connect()
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS lingo24_responses '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            rows = connection.execute(
+                'SELECT key, value, stored_at FROM lingo24_responses '
+                'ORDER BY stored_at DESC LIMIT ?',
+                (self.max_entries,),
+            ).fetchall()
+            if rows and len(rows) == self.max_entries:
+                # Discard entries that no longer fit in the cache.
+                connection.execute(
+                    'DELETE FROM lingo24_responses WHERE stored_at < ?',
+                    (rows[-1][2],),
+                )
+        finally:
+            connection.close()
+        for key, value, stored_at in reversed(rows):
+            super(SQLiteResponseCache, self).set(key, json.loads(value), stored_at)
+
+    def _connect(self):
+        return connect_sqlite(self.path)
+
+    def set(self, key, value, stored_at=None):
+        if stored_at is None:
+            stored_at = time.time()
+        super(SQLiteResponseCache, self).set(key, value, stored_at)
+        connection = self._connect()
+        try:
+            connection.execute(
+                'INSERT OR REPLACE INTO lingo24_responses (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), stored_at),
+            )
+        finally:
+            connection.close()
+
+    def clear(self):
+        super(SQLiteResponseCache, self).clear()
+        connection = self._connect()
+        try:
+            connection.execute('DELETE FROM lingo24_responses')
+        finally:
+            connection.close()
@@ -1,21 +1,81 @@
 import json
+import threading
+import time
 import urlparse
+from multiprocessing.pool import ThreadPool
 
 import requests
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
 
+from ..exceptions import DeadlineExceeded
+from .cache import ResponseCache
+from .deadline import deadline, limit_timeout, propagate_deadline, remaining
 from .domains import DomainCollection
 from .endpoints import API_ENDPOINT_URLS
-from .files import FileCollection
+from .files import FileCollection, is_stream, stream_position
 from .locales import LocaleCollection
 from .services import ServiceCollection
+from .singleflight import SingleFlight
 from .projects import ProjectCollection
 
 
 class Client(object):
-    def __init__(self, authenticator, endpoint='live', per_page=25, endpoint_url=None):
+    def __init__(self, authenticator, endpoint='live', per_page=25, endpoint_url=None,
+                 pool_connections=DEFAULT_POOLSIZE, pool_maxsize=DEFAULT_POOLSIZE,
+                 pool_block=DEFAULT_POOLBLOCK, keep_alive=True, share_session=False,
+                 retry=None, rate_limiter=None, response_cache=None, conditional_requests=False,
+                 coalesce_requests=False, identity_map=None, connect_timeout=10, read_timeout=60,
+                 content_index=None, content_cache=None):
         self.authenticator = authenticator
         self.per_page = per_page
+        # Connection pool settings; `pool_connections` is the number of hosts
+        # for which pools are kept and `pool_maxsize` the number of
+        # connections kept open to each host.
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.share_session = share_session
         self._api_session = None
+        self._api_session_lock = threading.Lock()
+        # The session is shared straight away, so that it is also used for a
+        # token refresh made before the first API request.
+        if share_session:
+            self.authenticator.session = self.api_session
+        # An optional RetryPolicy; the counters record how many retries have
+        # been made and how long was spent waiting between them.
+        self.retry = retry
+        self.retry_count = 0
+        self.retry_delay_total = 0.0
+        self._retry_lock = threading.Lock()
+        # An optional RateLimiter, consulted before every request is sent.
+        self.rate_limiter = rate_limiter
+        # An optional ResponseCache for reference data (locales, services and
+        # domains).
+        self.response_cache = response_cache
+        # If conditional requests are enabled, the most recent responses
+        # carrying an ETag or Last-Modified validator are kept so that GETs
+        # can be made conditional, with the stored response being reused if
+        # the server reports it is unchanged.
+        self.validator_cache = None
+        if conditional_requests:
+            self.validator_cache = ResponseCache(max_entries=1000, ttl=None)
+        # If enabled, concurrent identical JSON GETs share a single request
+        # and its parsed result.
+        self.request_coalescer = SingleFlight() if coalesce_requests else None
+        # An optional IdentityMap, through which each item is represented by
+        # a single shared instance.
+        self.identity_map = identity_map
+        # Seconds to wait for a connection to be established, and between
+        # bytes of a response, before giving up (`None` waits forever).
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # An optional ContentIndex, used to avoid uploading content which has
+        # already been uploaded to another file.
+        self.content_index = content_index
+        # An optional FileContentCache, in which the content of downloaded
+        # target files is kept on disk.
+        self.content_cache = content_cache
         # endpoint_url takes precedence
         if endpoint_url:
             self.endpoint_url = endpoint_url
@@ -38,10 +98,55 @@ class Client(object):
     def api_session(self):
         # Using a session for all API communications means that connections
         # can be pooled and reused.
-        if self._api_session is None:
-            self._api_session = requests.Session()
+        with self._api_session_lock:
+            if self._api_session is None:
+                self._api_session = self.make_session()
         return self._api_session
 
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def deadline(self, seconds):
+        """
+        Returns a context manager which limits all of the API requests made
+        by the current thread within it (including those made on its behalf
+        by worker threads) to `seconds` in total, e.g. for a full collection
+        scan. The timeout of each request is cut short to fit, and
+        `DeadlineExceeded` is raised once no time remains.
+        """
+        return deadline(seconds)
+
+    def make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def warm_up(self, connections=1):
+        """
+        Open up to `connections` pooled connections to the API ahead of time
+        (by concurrently requesting the unauthenticated status endpoint), so
+        that later requests don't pay for the TCP and TLS handshakes.
+        """
+        connections = max(1, min(connections, self.pool_maxsize))
+
+        def request_status(_):
+            self.api_get('status', authenticate=False)
+
+        pool = ThreadPool(connections)
+        try:
+            pool.map(propagate_deadline(request_status), xrange(connections))
+        finally:
+            pool.terminate()
+
     @property
     def services(self):
         return ServiceCollection(self, per_page=self.per_page)
@@ -67,27 +172,119 @@ class Client(object):
 
     def api_request(self, method, path, authenticate=True, **kwargs):
         headers = kwargs.pop('headers', {})
+        timeout = kwargs.pop('timeout', self.timeout)
         url = self.make_url(path)
+        data = kwargs.get('data')
+        streamed = is_stream(data)
+        # A streamed body is consumed as it is sent, so can only be sent again
+        # if it can be rewound to where it started.
+        body_position = stream_position(data) if streamed else None
 
         def make_request():
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            access_token = None
             if authenticate:
-                auth = 'Bearer {}'.format(self.authenticator.access_token)
+                access_token = self.authenticator.access_token
+                auth = 'Bearer {}'.format(access_token)
                 headers.update({'Authorization': auth})
-            return self.api_session.request(method, url, headers=headers, **kwargs)
+            response = self.api_session.request(
+                method,
+                url,
+                headers=headers,
+                timeout=limit_timeout(timeout),
+                **kwargs
+            )
+            return access_token, response
 
-        response = make_request()
+        def make_authenticated_request():
+            access_token, response = make_request()
+            # If the request failed due to the access token being invalid,
+            # refresh it (unless another thread already has) and try again.
+            if response.status_code == 401:
+                self.authenticator.refresh_access_token(expired_token=access_token)
+                if streamed:
+                    try:
+                        data.seek(body_position)
+                    except (AttributeError, IOError, OSError, TypeError, ValueError):
+                        # The body has already been read, so the 401 is
+                        # raised rather than sending it again empty.
+                        return response
+                _, response = make_request()
+            return response
 
-        # If the request failed due to the access token being invalid, refresh
-        # it and try again.
-        if response.status_code == 401:
-            self.authenticator.refresh_access_token()
-            response = make_request()
+        retry = self.retry
+        if retry is not None and not retry.allows_method(method):
+            retry = None
+        # Nor are streamed bodies retried by the retry policy.
+        if streamed:
+            retry = None
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                response = make_authenticated_request()
+            except (requests.ConnectionError, requests.Timeout):
+                # A request cut short by the deadline is reported as such.
+                remaining()
+                if retry is None:
+                    raise
+                delay = retry.next_delay(attempt, started)
+                if delay is None:
+                    raise
+            else:
+                if retry is None or not retry.is_retryable_response(response):
+                    break
+                delay = retry.next_delay(attempt, started, response)
+                if delay is None:
+                    break
+            # Don't wait for a retry which couldn't be made before the
+            # deadline.
+            left = remaining()
+            if left is not None and delay >= left:
+                raise DeadlineExceeded('Deadline exceeded')
+            self._record_retry(delay)
+            time.sleep(delay)
+            attempt += 1
 
         response.raise_for_status()
         return response
 
-    def api_get(self, *args, **kwargs):
-        return self.api_request('get', *args, **kwargs)
+    def _record_retry(self, delay):
+        with self._retry_lock:
+            self.retry_count += 1
+            self.retry_delay_total += delay
+
+    def api_get(self, path, *args, **kwargs):
+        return self._conditional_get(path, *args, **kwargs)[0]
+
+    def _conditional_get(self, path, *args, **kwargs):
+        """
+        Makes a GET request, which is conditional on the validators of the
+        previous response from the same URL if conditional requests are
+        enabled. Returns the response (the previous one, if the server reports
+        it unchanged) and its entry in the validator cache, in which its
+        parsed JSON can also be kept, or `None` if it isn't cached.
+        """
+        if self.validator_cache is None or kwargs.get('stream'):
+            return self.api_request('get', path, *args, **kwargs), None
+        headers = dict(kwargs.pop('headers', {}))
+        key = (self.make_url(path), headers.get('Accept'))
+        found, entry = self.validator_cache.get(key)
+        if found:
+            cached = entry['response']
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+        response = self.api_request('get', path, headers=headers, *args, **kwargs)
+        if response.status_code == 304 and found:
+            return entry['response'], entry
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            entry = {'response': response}
+            self.validator_cache.set(key, entry)
+            return response, entry
+        return response, None
 
     def api_put(self, *args, **kwargs):
         return self.api_request('put', *args, **kwargs)
@@ -98,12 +295,30 @@ class Client(object):
     def api_delete(self, *args, **kwargs):
         return self.api_request('delete', *args, **kwargs)
 
-    def api_get_json(self, *args, **kwargs):
+    def api_get_json(self, path, *args, **kwargs):
         headers = kwargs.pop('headers', {})
         headers.update({
             'Accept': 'application/json',
         })
-        return self.api_get(headers=headers, *args, **kwargs).json()
+
+        def get_json():
+            response, entry = self._conditional_get(path, headers=headers, *args, **kwargs)
+            if entry is None:
+                return response.json()
+            # An unchanged response is only parsed once.
+            if 'json' not in entry:
+                entry['json'] = response.json()
+            return entry['json']
+
+        if self.request_coalescer is None or args or set(kwargs) - set(['authenticate']):
+            return get_json()
+        key = (
+            'GET',
+            self.make_url(path),
+            kwargs.get('authenticate', True),
+            tuple(sorted(headers.items())),
+        )
+        return self.request_coalescer.do(key, get_json)
 
     def api_put_json(self, data, *args, **kwargs):
         headers = kwargs.pop('headers', {})
@@ -1,15 +1,21 @@
 import itertools
 import urllib
 from abc import ABCMeta, abstractmethod, abstractproperty
+from multiprocessing.pool import ThreadPool
 
 import requests
 
-from ..exceptions import APIError, DoesNotExist, reraise
+from ..exceptions import APIError, DoesNotExist, PaginationDrift, reraise
+from .deadline import propagate_deadline
 
 
 class BaseCollection(object):
     __metaclass__ = ABCMeta
 
+    # Whether responses from this collection may be kept in the client's
+    # response cache (if it has one).
+    cache_responses = False
+
     def __init__(self, client):
         self.client = client
 
@@ -27,8 +33,16 @@ class BaseCollection(object):
     def make_item(self, **kwargs):
         pass  # pragma: no cover
 
+    def _get_json(self, path):
+        cache = self.client.response_cache
+        if cache is None or not self.cache_responses:
+            return self.client.api_get_json(path)
+        # Entries are keyed by the full URL, so that a cache shared between
+        # clients for different endpoints keeps their responses apart.
+        return cache.fetch(self.url_path, self.client.make_url(path), lambda: self.client.api_get_json(path))
+
     def _fetch(self, path):
-        return self.client.api_get_json(path)
+        return self._get_json(path)
 
     def clone(self, *args, **kwargs):
         return self.__class__(client=self.client, *args, **kwargs)
@@ -46,20 +60,51 @@ class AddressableCollection(BaseCollection):
     def get(self, item_id):
         path = self.item_url_path(item_id)
         try:
-            data = self.client.api_get_json(path)
+            data = self._get_json(path)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 raise DoesNotExist
             else:
                 reraise(APIError)
         return self.make_item(**data)
 
+    def get_many(self, item_ids, workers=4):
+        """
+        Fetch the items with the given IDs concurrently, using up to `workers`
+        threads. Duplicate IDs are only fetched once. Returns a tuple of two
+        dicts: the items that were fetched and the errors (`DoesNotExist` or
+        `APIError`) raised for those that weren't, each keyed by ID.
+        """
+        item_ids = list(set(item_ids))
+        items = {}
+        errors = {}
+        if not item_ids:
+            return items, errors
+
+        def fetch(item_id):
+            try:
+                return item_id, self.get(item_id), None
+            except (APIError, DoesNotExist) as exc:
+                return item_id, None, exc
+
+        pool = ThreadPool(min(workers, len(item_ids)))
+        try:
+            for item_id, item, error in pool.imap_unordered(propagate_deadline(fetch), item_ids):
+                if error is None:
+                    items[item_id] = item
+                else:
+                    errors[item_id] = error
+        finally:
+            pool.terminate()
+        return items, errors
+
 
 class PaginatableCollection(BaseCollection):
     __metaclass__ = ABCMeta
 
     def __init__(self, *args, **kwargs):
         self.per_page = kwargs.pop('per_page', 25)
+        self.prefetch_depth = kwargs.pop('prefetch_depth', 0)
         super(PaginatableCollection, self).__init__(*args, **kwargs)
         self._page_meta = None
 
@@ -85,17 +130,20 @@ class PaginatableCollection(BaseCollection):
         url = '{}?{}'.format(self.url_path, query)
         return self._fetch(url)
 
-    def _iterate(self, start_page=0, follow_links=True):
+    def _iterate_pages(self, start_page=0, follow_links=True):
+        """
+        Yields the raw responses for each page, starting at `start_page` and
+        (optionally) following the `next` links.
+        """
         try:
             response = self._fetch_page(start_page)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 return
             else:
                 reraise(APIError)
         while True:
-            for project_record in response['content']:
-                yield self.make_item(**project_record)
+            yield response
             next_url = None
             for link in response.get('links', ()):
                 if link.get('rel') == 'next':
@@ -106,6 +154,58 @@ class PaginatableCollection(BaseCollection):
             else:
                 break
 
+    def _read_ahead(self, start_page, depth):
+        """
+        Yields the raw responses for each page, starting at `start_page`. Once
+        the first page has shown how many there are, up to `depth` of the
+        following pages are fetched concurrently by index, ahead of the
+        caller. Pages are yielded in their original order and any error
+        raised while fetching is re-raised in the caller's thread.
+        """
+        first = None
+        for first in self._iterate_pages(start_page, follow_links=False):
+            break
+        if first is None:
+            return
+        page_indexes = iter(xrange(start_page + 1, first['page']['totalPages']))
+        fetch = propagate_deadline(self._fetch_indexed_page)
+        pool = ThreadPool(depth)
+        try:
+            # Each page's result is taken in turn, and another page requested
+            # in its place, so that no more than `depth` are ever in flight
+            # or waiting to be used.
+            pending = [
+                pool.apply_async(fetch, (page_index,))
+                for page_index in itertools.islice(page_indexes, depth)
+            ]
+            yield first
+            while pending:
+                response = pending.pop(0).get()
+                if response is None:
+                    # The collection has shrunk since the first page.
+                    return
+                for page_index in itertools.islice(page_indexes, 1):
+                    pending.append(pool.apply_async(fetch, (page_index,)))
+                yield response
+        finally:
+            pool.terminate()
+
+    def _page_items(self, response):
+        """
+        Returns the items on a fetched page. Subclasses may extend this to
+        process each page's items together.
+        """
+        return [self.make_item(**record) for record in response['content']]
+
+    def _iterate(self, start_page=0, follow_links=True):
+        if self.prefetch_depth and follow_links:
+            pages = self._read_ahead(start_page, self.prefetch_depth)
+        else:
+            pages = self._iterate_pages(start_page, follow_links)
+        for response in pages:
+            for item in self._page_items(response):
+                yield item
+
     def __eq__(self, other):
         return all((
             super(PaginatableCollection, self).__eq__(other),
@@ -154,10 +254,71 @@ class PaginatableCollection(BaseCollection):
     def clone(self, *args, **kwargs):
         return super(PaginatableCollection, self).clone(
             per_page=self.per_page,
+            prefetch_depth=self.prefetch_depth,
             *args,
             **kwargs
         )
 
+    def prefetch(self, depth=4):
+        """
+        Returns a copy of this collection which, when iterated, fetches up to
+        `depth` pages concurrently in the background while the current page
+        is consumed. Items are yielded in the same order; at most `depth`
+        pages are held in memory ahead of the caller.
+        """
+        if depth < 0:
+            raise ValueError('Prefetch depth must not be negative')
+        clone = self.clone()
+        clone.prefetch_depth = depth
+        return clone
+
+    def _fetch_indexed_page(self, page_index):
+        """
+        Fetches a page by index, returning `None` if it no longer exists.
+        """
+        try:
+            return self._fetch_page(page_index)
+        except requests.RequestException as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                return None
+            reraise(APIError)
+
+    def parallel_iter(self, workers=4, ordered=True):
+        """
+        Returns an iterator of all items in the collection, fetching the pages
+        concurrently using up to `workers` threads. The first page is fetched
+        to discover the number of pages; the remaining pages are then
+        requested by index. If `ordered` is `False`, items are yielded page by
+        page in whichever order the pages arrive.
+
+        Raises PaginationDrift if the total number of items changes during the
+        scan.
+        """
+        if workers < 1:
+            raise ValueError('At least one worker is required')
+        first = self._fetch_indexed_page(0)
+        if first is None:
+            return
+        expected_total = first['page']['totalElements']
+        page_count = first['page']['totalPages']
+        for item in self._page_items(first):
+            yield item
+        if page_count <= 1:
+            return
+        pool = ThreadPool(min(workers, page_count - 1))
+        try:
+            imap = pool.imap if ordered else pool.imap_unordered
+            for response in imap(propagate_deadline(self._fetch_indexed_page), xrange(1, page_count)):
+                if response is None:
+                    raise PaginationDrift(expected_total, None)
+                actual_total = response['page']['totalElements']
+                if actual_total != expected_total:
+                    raise PaginationDrift(expected_total, actual_total)
+                for item in self._page_items(response):
+                    yield item
+        finally:
+            pool.terminate()
+
     def get_page(self, page_index):
         """
         Returns an iterator of items on the requested page
@@ -0,0 +1,136 @@
+import errno
+import os
+from contextlib import contextmanager
+
+from .downloads import CHUNK_SIZE, atomic_write
+from .locks import FileLock
+
+
+class FileContentCache(object):
+    """
+    Keeps the content of downloaded files on disk in `directory`, keyed by
+    file ID, so that reading it again needn't make a request. Only TARGET
+    files are cached, since their content doesn't change once translated.
+
+    The total size of the cached content is limited to `max_bytes`, with the
+    least recently used files being evicted first. The cache can be shared
+    between processes: entries are written atomically, and evictions are
+    serialised using a lock file in the directory. A separate directory
+    should be used for each API endpoint, as file IDs aren't shared.
+    """
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        try:
+            os.makedirs(directory)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        self._lock = FileLock(os.path.join(directory, '.lock'))
+
+    def path(self, file_id):
+        return os.path.join(self.directory, '{:d}'.format(file_id))
+
+    def open(self, file_id):
+        """
+        Returns the cached content of the file as a file object opened for
+        reading, or `None` if it isn't cached.
+        """
+        path = self.path(file_id)
+        try:
+            f = open(path, 'rb')
+        except IOError as exc:
+            if exc.errno == errno.ENOENT:
+                return None
+            raise
+        # The modification time records when the entry was last used.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return f
+
+    def get(self, file_id):
+        f = self.open(file_id)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def iter_content(self, file_id, chunk_size=CHUNK_SIZE):
+        """
+        Returns an iterator of the cached content of the file in chunks of up
+        to `chunk_size` bytes, or `None` if it isn't cached.
+        """
+        f = self.open(file_id)
+        if f is None:
+            return None
+
+        def chunks():
+            with f:
+                for chunk in iter(lambda: f.read(chunk_size), ''):
+                    yield chunk
+        return chunks()
+
+    @contextmanager
+    def writer(self, file_id):
+        """
+        Opens a file object to which the content of the file can be written
+        in binary mode. The content is only added to the cache if the block
+        completes without raising.
+        """
+        path = self.path(file_id)
+        with atomic_write(path) as f:
+            yield f
+        self._evict()
+
+    def set(self, file_id, content):
+        with self.writer(file_id) as f:
+            f.write(content)
+
+    def discard(self, file_id):
+        try:
+            os.unlink(self.path(file_id))
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+    def clear(self):
+        with self._lock:
+            for _, path, _ in self._entries():
+                self._remove(path)
+
+    @property
+    def size(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.isdigit():
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
@@ -0,0 +1,84 @@
+import time
+
+from .sqlite import connect_sqlite
+
+
+class ContentIndex(object):
+    """
+    Maps the SHA-256 checksum of file content to the ID of a Lingo24 file
+    which already has that content, so that identical content needn't be
+    uploaded again. Entries are kept in a SQLite database (in WAL mode) at
+    `path`, which can be shared between processes, and are kept separately
+    for each API endpoint.
+    """
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        connection = self._connect()
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS lingo24_content '
+                '(endpoint TEXT NOT NULL, sha256 TEXT NOT NULL, file_id INTEGER NOT NULL, '
+                'size INTEGER NOT NULL, stored_at REAL NOT NULL, PRIMARY KEY (endpoint, sha256))'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS lingo24_content_file_id ON lingo24_content (file_id)'
+            )
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return connect_sqlite(self.path, self.timeout)
+
+    def get(self, endpoint, sha256):
+        """
+        Returns the ID of the file with the given content, or `None`.
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                'SELECT file_id FROM lingo24_content WHERE endpoint = ? AND sha256 = ?',
+                (endpoint, sha256),
+            ).fetchone()
+        finally:
+            connection.close()
+        return row[0] if row is not None else None
+
+    def set(self, endpoint, sha256, file_id, size):
+        connection = self._connect()
+        try:
+            connection.execute(
+                'INSERT OR REPLACE INTO lingo24_content (endpoint, sha256, file_id, size, stored_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (endpoint, sha256, file_id, size, time.time()),
+            )
+        finally:
+            connection.close()
+
+    def discard(self, endpoint, sha256):
+        """
+        Removes the entry for the given content (e.g. because the file it
+        refers to no longer exists).
+        """
+        connection = self._connect()
+        try:
+            connection.execute(
+                'DELETE FROM lingo24_content WHERE endpoint = ? AND sha256 = ?',
+                (endpoint, sha256),
+            )
+        finally:
+            connection.close()
+
+    def discard_file(self, endpoint, file_id):
+        """
+        Removes any entry referring to the given file (e.g. because its
+        content is being replaced).
+        """
+        connection = self._connect()
+        try:
+            connection.execute(
+                'DELETE FROM lingo24_content WHERE endpoint = ? AND file_id = ?',
+                (endpoint, file_id),
+            )
+        finally:
+            connection.close()
@@ -0,0 +1,83 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from ..exceptions import DeadlineExceeded
+
+
+_local = threading.local()
+
+
+def current_deadline():
+    """
+    Returns the time (as from `time.time`) by which the current thread's
+    operation must finish, or `None` if there is no deadline.
+    """
+    return getattr(_local, 'deadline', None)
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Limits the API requests made by the current thread within the block to
+    `seconds` in total. A deadline nested inside another can only shorten
+    it, never extend it.
+    """
+    previous = current_deadline()
+    expires_at = time.time() + seconds
+    if previous is not None:
+        expires_at = min(expires_at, previous)
+    _local.deadline = expires_at
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def remaining():
+    """
+    Returns the number of seconds left before the current deadline, or
+    `None` if there is no deadline. Raises `DeadlineExceeded` if it has
+    already passed.
+    """
+    expires_at = current_deadline()
+    if expires_at is None:
+        return None
+    left = expires_at - time.time()
+    if left <= 0:
+        raise DeadlineExceeded('Deadline exceeded')
+    return left
+
+
+def limit_timeout(timeout):
+    """
+    Shortens a requests `timeout` (a number of seconds, a (connect, read)
+    tuple or `None`) so that it doesn't extend past the current deadline.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    if timeout is None:
+        return left
+    return min(timeout, left)
+
+
+def propagate_deadline(func):
+    """
+    Wraps `func` so that, when it is run in another thread (e.g. by a thread
+    pool), it is subject to the deadline of the thread that wrapped it.
+    """
+    expires_at = current_deadline()
+    if expires_at is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        previous = current_deadline()
+        _local.deadline = expires_at
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.deadline = previous
+    return wrapper
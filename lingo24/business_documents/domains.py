@@ -1,9 +1,12 @@
 from .collections import SortablePaginatableAddressableCollection
+from .identity import identity_mapped
 
 
 class DomainCollection(SortablePaginatableAddressableCollection):
     url_path = 'domains/'
+    cache_responses = True
 
+    @identity_mapped
     def make_item(self, **kwargs):
         return Domain(
             domain_id=kwargs['id'],
@@ -0,0 +1,473 @@
+import errno
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from ..exceptions import APIError, DeadlineExceeded, DoesNotExist, reraise
+from .deadline import propagate_deadline
+
+
+# The default number of bytes read at a time when streaming file content.
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Opens a temporary file alongside `path` for writing in binary mode. When
+    the block completes, the temporary file replaces `path` in one step; if
+    it raises, the temporary file is removed and `path` is left untouched.
+    """
+    temp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(temp_path, path)
+    except:
+        os.unlink(temp_path)
+        raise
+
+
+class _Restart(Exception):
+    """
+    Raised when the partial download can't be continued (e.g. because the
+    content has changed on the server) and has to start again from scratch.
+    """
+
+
+class ResumableDownload(object):
+    """
+    Downloads a file's content to `path` using HTTP Range requests, so that
+    an interrupted download can carry on from where it stopped rather than
+    starting again.
+
+    The content is written to `<path>.part`, with the progress made recorded
+    in `<path>.part.json`; both are kept if the download fails, so that it
+    can be resumed later (even by another process). Once complete, the
+    partial file is renamed to `path`.
+
+    With `parts` greater than one, the content is split into that many byte
+    ranges which are downloaded concurrently. If the server doesn't support
+    Range requests, the whole file is downloaded in one go instead.
+    """
+    # The number of bytes written between saves of the progress made.
+    save_interval = 1024 * 1024
+
+    def __init__(self, file_obj, path, chunk_size=CHUNK_SIZE, parts=1, attempts=3):
+        self.file = file_obj
+        self.client = file_obj.client
+        self.path = path
+        self.part_path = '{}.part'.format(path)
+        self.state_path = '{}.part.json'.format(path)
+        self.chunk_size = chunk_size
+        self.parts = max(1, parts)
+        self.attempts = max(1, attempts)
+        self.state = None
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    @property
+    def content_path(self):
+        return '{}/content'.format(self.file.url_path)
+
+    def run(self, checksum=None):
+        """
+        Downloads the file, retrying (from where it stopped) up to `attempts`
+        times if the transfer fails. Returns the hex digest of the content if
+        `checksum` names a `hashlib` algorithm, otherwise `None`.
+        """
+        for attempt in xrange(self.attempts):
+            try:
+                self._download()
+                break
+            except _Restart:
+                self._discard()
+                if attempt == self.attempts - 1:
+                    raise APIError('The file content changed during the download')
+            except (DoesNotExist, DeadlineExceeded):
+                raise
+            except APIError:
+                if attempt == self.attempts - 1:
+                    raise
+        digest = None
+        if checksum is not None:
+            digest = hashlib.new(checksum)
+            with open(self.part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), ''):
+                    digest.update(chunk)
+        os.rename(self.part_path, self.path)
+        self._remove(self.state_path)
+        return digest.hexdigest() if digest is not None else None
+
+    def _download(self):
+        if self.state is None:
+            self.state = self._load_state()
+        if self.state is None:
+            self._start()
+        ranges = [r for r in self.state['ranges'] if not self._range_complete(r)]
+        if len(ranges) == 1:
+            self._fetch_range(ranges[0])
+        elif ranges:
+            self._fetch_ranges(ranges)
+        self._save_state()
+
+    def _fetch_ranges(self, ranges):
+        """
+        Fetches each of `ranges` in its own thread. Every thread is waited for
+        before any error is raised, so that none is still
+        writing to the partial file or advancing its range when the download
+        is retried; the ranges which did complete needn't be fetched again.
+        """
+        errors = []
+
+        def fetch(byte_range):
+            try:
+                self._fetch_range(byte_range)
+            except Exception:
+                errors.append(sys.exc_info())
+
+        threads = [
+            threading.Thread(target=propagate_deadline(fetch), args=(byte_range,))
+            for byte_range in ranges
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            # A restart discards the progress of every range, so it takes
+            # precedence over errors which can be retried from where they were.
+            restarts = [error for error in errors if issubclass(error[0], _Restart)]
+            exc_type, value, traceback = (restarts or errors)[0]
+            raise exc_type, value, traceback
+
+    def _start(self):
+        """
+        Begins a new download. For a single part, the whole content is
+        requested; otherwise its size is found first so that it can be
+        divided between the parts.
+        """
+        if self.parts == 1:
+            self._reset(size=None, validator=None)
+            return
+        try:
+            response = self._request('bytes=0-0')
+        except _Restart:
+            # Not even the first byte exists, so the content is empty.
+            self._reset(size=0, validator=None)
+            self._save_state()
+            return
+        try:
+            if response.status_code != 206:
+                # Range requests aren't supported, so the full content has
+                # been sent; use it rather than requesting it again.
+                self._reset(size=self._content_length(response), validator=self._validator(response))
+                self._write_response(self.state['ranges'][0], response)
+                return
+            _, _, size = self._content_range(response)
+            validator = self._validator(response)
+        finally:
+            response.close()
+        self._reset(size=size, validator=validator)
+        if size:
+            with open(self.part_path, 'r+b') as f:
+                f.truncate(size)
+            part_size = -(-size // self.parts)
+            self.state['ranges'] = [
+                [start, min(start + part_size, size) - 1, 0]
+                for start in xrange(0, size, part_size)
+            ]
+        self._save_state()
+
+    def _reset(self, size, validator):
+        open(self.part_path, 'wb').close()
+        self.state = {
+            'size': size,
+            'validator': validator,
+            'ranges': [[0, None, 0]],
+        }
+
+    def _range_complete(self, byte_range):
+        start, end, done = byte_range
+        if end is None:
+            size = self.state['size']
+            return size is not None and start + done >= size
+        return start + done > end
+
+    def _fetch_range(self, byte_range):
+        start, end, done = byte_range
+        offset = start + done
+        if offset == 0 and end is None:
+            byte_spec = None
+        else:
+            byte_spec = 'bytes={}-{}'.format(offset, '' if end is None else end)
+        try:
+            response = self._request(byte_spec)
+        except _Restart:
+            if self.state['size'] is not None and offset >= self.state['size']:
+                return
+            raise
+        if byte_spec is not None and response.status_code != 206:
+            # The Range was ignored, either because the content has changed or
+            # because the server doesn't support it. A single part can simply
+            # start again; other parts are being written concurrently.
+            if len(self.state['ranges']) > 1 or start != 0:
+                response.close()
+                raise _Restart
+            self.state['size'] = self._content_length(response)
+            self.state['validator'] = self._validator(response)
+            byte_range[2] = 0
+            with open(self.part_path, 'r+b') as f:
+                f.truncate(0)
+        elif self.state['validator'] is None:
+            self.state['validator'] = self._validator(response)
+        if self.state['size'] is None:
+            if response.status_code == 206:
+                self.state['size'] = self._content_range(response)[2]
+            else:
+                self.state['size'] = self._content_length(response)
+        self._write_response(byte_range, response)
+
+    def _write_response(self, byte_range, response):
+        start, end, _ = byte_range
+        try:
+            with open(self.part_path, 'r+b') as f:
+                f.seek(start + byte_range[2])
+                for chunk in response.iter_content(self.chunk_size):
+                    if end is not None:
+                        chunk = chunk[:end + 1 - (start + byte_range[2])]
+                    f.write(chunk)
+                    f.flush()
+                    self._advance(byte_range, len(chunk))
+        except requests.RequestException:
+            reraise(APIError)
+        finally:
+            response.close()
+            self._save_state()
+        if not self._range_complete(byte_range) and (end is not None or self.state['size'] is not None):
+            raise APIError('The download ended early')
+        if end is None and self.state['size'] is None:
+            # The size wasn't known up front; the content is complete now
+            # that the whole response has been read.
+            self.state['size'] = start + byte_range[2]
+
+    def _advance(self, byte_range, length):
+        with self._lock:
+            byte_range[2] += length
+            self._unsaved += length
+            save = self._unsaved >= self.save_interval
+        if save:
+            self._save_state()
+
+    def _request(self, byte_spec):
+        headers = {}
+        if byte_spec is not None:
+            headers['Range'] = byte_spec
+            if self.state is not None and self.state['validator'] is not None:
+                headers['If-Range'] = self.state['validator']
+        try:
+            return self.client.api_get(self.content_path, stream=True, headers=headers)
+        except requests.RequestException as exc:
+            if exc.response is not None:
+                if exc.response.status_code == 404:
+                    raise DoesNotExist
+                if exc.response.status_code == 416:
+                    raise _Restart
+            reraise(APIError)
+
+    @staticmethod
+    def _validator(response):
+        return response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+    @staticmethod
+    def _content_length(response):
+        try:
+            return int(response.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _content_range(response):
+        match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+        if match is None:
+            raise APIError('Invalid Content-Range in partial response')
+        start, end, size = match.groups()
+        return int(start), int(end), None if size == '*' else int(size)
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'rb') as f:
+                state = json.load(f)
+        except IOError as exc:
+            if exc.errno == errno.ENOENT:
+                return None
+            raise
+        except ValueError:
+            return None
+        if not os.path.exists(self.part_path):
+            return None
+        return state
+
+    def _save_state(self):
+        with self._lock:
+            self._unsaved = 0
+            with atomic_write(self.state_path) as f:
+                json.dump(self.state, f)
+
+    def _discard(self):
+        self.state = None
+        self._remove(self.part_path)
+        self._remove(self.state_path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+
+# The name of the file, kept in the destination directory, which records the
+# target files downloaded by `download_job_targets`.
+MANIFEST_NAME = '.lingo24-manifest.json'
+
+
+def locale_directory(locale):
+    """
+    Returns the directory name used for files in the given locale, e.g.
+    `fr_FR`.
+    """
+    if locale.country:
+        return '{}_{}'.format(locale.language, locale.country)
+    return locale.language
+
+
+def file_digest(path, algorithm='sha256', chunk_size=CHUNK_SIZE):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TargetDownloadResult(object):
+    """
+    The outcome of `Project.download_targets`: the paths of the files which
+    were `downloaded` and of those `skipped` as already up to date, and the
+    `(job, error)` pairs for jobs whose target file couldn't be downloaded.
+    """
+    def __init__(self):
+        self.downloaded = []
+        self.skipped = []
+        self.errors = []
+
+    def __repr__(self):
+        return '<TargetDownloadResult: {} downloaded, {} skipped, {} failed>'.format(
+            len(self.downloaded),
+            len(self.skipped),
+            len(self.errors),
+        )
+
+
+def download_job_targets(jobs, directory, workers=4, verify=False, chunk_size=CHUNK_SIZE):
+    """
+    Downloads the target file of each of `jobs` which has one into a
+    subdirectory of `directory` named after its target locale, using a
+    pool of `workers` threads. Returns a `TargetDownloadResult`.
+
+    The size and SHA-256 checksum of each downloaded file are recorded in a
+    manifest in `directory`. A file already listed there is skipped if it
+    still has the recorded size (and, if `verify` is set, checksum).
+    """
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'rb') as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        manifest = {}
+    lock = threading.Lock()
+    result = TargetDownloadResult()
+
+    # Decide where each file goes up front, so that two files with the same
+    # name in the same locale can't claim the same path.
+    targets = []
+    claimed = set()
+    for job in jobs:
+        try:
+            target_file = job.target_file
+            if target_file is None:
+                continue
+            locale = job.target_locale
+        except (APIError, DoesNotExist) as exc:
+            result.errors.append((job, exc))
+            continue
+        name = os.path.basename(target_file.name)
+        relative_path = os.path.join(locale_directory(locale), name)
+        if relative_path in claimed:
+            relative_path = os.path.join(locale_directory(locale), '{}-{}'.format(target_file.id, name))
+        claimed.add(relative_path)
+        targets.append((job, target_file, relative_path))
+
+    def up_to_date(target_file, relative_path, path):
+        entry = manifest.get(relative_path)
+        if entry is None or entry.get('id') != target_file.id:
+            return False
+        try:
+            if os.path.getsize(path) != entry['size']:
+                return False
+        except OSError:
+            return False
+        return not verify or file_digest(path, chunk_size=chunk_size) == entry['sha256']
+
+    def download(target):
+        job, target_file, relative_path = target
+        path = os.path.join(directory, relative_path)
+        if up_to_date(target_file, relative_path, path):
+            return target, path, True, None
+        try:
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+            digest = target_file.download_to(path, chunk_size=chunk_size, checksum='sha256')
+        except (APIError, DoesNotExist, IOError, OSError) as exc:
+            return target, path, False, exc
+        with lock:
+            manifest[relative_path] = {
+                'id': target_file.id,
+                'size': os.path.getsize(path),
+                'sha256': digest,
+            }
+        return target, path, False, None
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    pool = ThreadPool(max(1, min(workers, len(targets))))
+    try:
+        for (job, _, _), path, skipped, error in pool.imap_unordered(propagate_deadline(download), targets):
+            if error is not None:
+                result.errors.append((job, error))
+            elif skipped:
+                result.skipped.append(path)
+            else:
+                result.downloaded.append(path)
+    finally:
+        pool.terminate()
+        with atomic_write(manifest_path) as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    return result
@@ -1,12 +1,112 @@
+import hashlib
 import json
+import mmap
+import os
 
 import requests
+from requests.utils import super_len
 
-from ..exceptions import APIError, reraise
+from ..exceptions import APIError, DoesNotExist, reraise
 from .collections import AddressableCollection
+from .downloads import CHUNK_SIZE, ResumableDownload, atomic_write
+from .identity import identity_mapped
+from .uploads import UploadResult, bulk_upload
+
+
+def is_stream(data):
+    """
+    Returns `True` if `data` is a request body which is read as it is sent
+    (a file-like object or an iterator), and so can't be sent again.
+    """
+    if hasattr(data, 'read'):
+        return True
+    return hasattr(data, '__iter__') and not isinstance(data, (basestring, list, tuple, dict))
+
+
+def stream_position(data):
+    """
+    Returns the current position of a file-like request body, so that it can
+    be sent again by seeking back to it, or `None` if it can't be.
+    """
+    try:
+        return data.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+
+
+def content_checksum(source, chunk_size=CHUNK_SIZE):
+    """
+    Returns the SHA-256 hex digest and size of the content of `source`, a
+    path or a file object (which is read from, and then returned to, its
+    current position). Returns `None` if the content can't be read twice.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    if isinstance(source, basestring):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), ''):
+                digest.update(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size
+    if not hasattr(source, 'read'):
+        return None
+    seekable = getattr(source, 'seekable', None)
+    if seekable is not None and not seekable():
+        return None
+    try:
+        position = source.tell()
+        # Some streams report their position but can't seek, which must be
+        # found out before anything is read from them.
+        source.seek(position)
+        for chunk in iter(lambda: source.read(chunk_size), ''):
+            digest.update(chunk)
+            size += len(chunk)
+        source.seek(position)
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return digest.hexdigest(), size
+
+
+class ProgressReader(object):
+    """
+    Wraps a file-like object of `length` bytes (`None` if unknown) for use as
+    a request body, calling `progress(bytes_read, length)` after each read.
+    """
+    def __init__(self, source, length=None, progress=None, chunk_size=CHUNK_SIZE):
+        self.source = source
+        # requests sends the body with a Content-Length if it is known, or
+        # using chunked transfer encoding if not.
+        self.len = length or 0
+        self.length = length
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.bytes_read += len(data)
+        if self.progress is not None and data:
+            self.progress(self.bytes_read, self.length)
+        return data
+
+    # Positions are relative to where the body starts in `source`.
+    def tell(self):
+        return self.bytes_read
+
+    def seek(self, position):
+        self.source.seek(self.source.tell() - self.bytes_read + position)
+        self.bytes_read = position
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
 
 class BaseFileCollection(AddressableCollection):
+    @identity_mapped
     def make_item(self, **kwargs):
         return File(
             client=self.client,
@@ -37,6 +137,68 @@ class FileCollection(BaseFileCollection):
             reraise(APIError)
         return self.make_item(**response)
 
+    def create_with_content(self, name, source, project=None, chunk_size=CHUNK_SIZE):
+        """
+        Create a SOURCE file with the specified name and upload its content
+        from `source` (anything accepted by `File.upload_from`). If `project`
+        is given, the file is also added to it.
+
+        If the client has a `content_index` and it lists a file with the same
+        content, that file is used instead, so the content isn't uploaded
+        again. This requires the checksum of the content to be calculated
+        beforehand, so only applies when `source` is a path or a seekable
+        file object.
+        """
+        result = UploadResult(source, name)
+        self._create_with_content(result, source, project, chunk_size)
+        return result.file
+
+    def _create_with_content(self, result, source, project, chunk_size):
+        """
+        Sets the `file`, `bytes_sent` and `reused` of `result` (an
+        `UploadResult`) as the file is created and uploaded.
+        """
+        index = self.client.content_index
+        endpoint = self.client.api_endpoint_url
+        checksum = None
+        if index is not None:
+            checksum = content_checksum(source, chunk_size)
+        if checksum is not None:
+            file_id = index.get(endpoint, checksum[0])
+            if file_id is not None:
+                try:
+                    result.file = self.get(file_id)
+                    result.reused = True
+                except DoesNotExist:
+                    index.discard(endpoint, checksum[0])
+        if not result.reused:
+            result.file = self.create(result.name)
+            result.bytes_sent = result.file.upload_from(source, chunk_size=chunk_size)
+            if checksum is not None:
+                index.set(endpoint, checksum[0], result.file.id, checksum[1])
+        if project is not None:
+            project.files.add(result.file)
+
+    def bulk_upload(self, items, workers=4, project=None, chunk_size=CHUNK_SIZE):
+        """
+        Creates a SOURCE file for each of `items` and uploads its content,
+        using a pool of `workers` threads so that the requests for different
+        files overlap. Each item is either a path (the file is named after
+        its base name) or a `(name, source)` tuple, where `source` is
+        anything accepted by `File.upload_from`; content is streamed rather
+        than read into memory. If `project` is given, each file is also added
+        to it. As with `create_with_content`, content listed in the client's
+        `content_index` isn't uploaded again.
+
+        Returns a `BulkUploadResult`, with the outcome of each item and a
+        summary of the throughput. A failure doesn't stop other items being
+        uploaded.
+        """
+        def upload(result, source):
+            self._create_with_content(result, source, project, chunk_size)
+
+        return bulk_upload(upload, items, workers=workers)
+
 
 class File(object):
     def __init__(self, client, file_id, name, file_type):
@@ -44,6 +206,9 @@ class File(object):
         self.id = file_id
         self.name = name
         self.type = file_type
+        # Whether the content is known not to change any more, so that it can
+        # be cached; set for the target file of a translated job.
+        self.content_final = False
 
     def __repr__(self):
         return '<File {}: {}>'.format(self.id, self.name)
@@ -63,30 +228,199 @@ class File(object):
     def url_path(self):
         return FileCollection(self.client).item_url_path(self.id)
 
+    @property
+    def content_cache(self):
+        """
+        The client's `FileContentCache`, if it has one and this is a TARGET
+        file whose content is final (see `Job.target_file`); otherwise `None`.
+        """
+        if self.type != 'TARGET' or not self.content_final:
+            return None
+        return self.client.content_cache
+
+    def _discard_cached_content(self):
+        if self.client.content_cache is not None:
+            self.client.content_cache.discard(self.id)
+
+    def _discard_indexed_content(self):
+        # The file's content may no longer match what the index lists for it.
+        if self.client.content_index is not None:
+            self.client.content_index.discard_file(self.client.api_endpoint_url, self.id)
+
     @property
     def content(self):
+        cache = self.content_cache
+        if cache is not None:
+            content = cache.get(self.id)
+            if content is not None:
+                return content
         path = '{}/content'.format(self.url_path)
         try:
             response = self.client.api_get(path, stream=True)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 content = None
             else:
                 reraise(APIError)
         else:
             content = response.content
+            if cache is not None:
+                cache.set(self.id, content)
         return content
 
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        """
+        Returns an iterator of the file's content in chunks of up to
+        `chunk_size` bytes, which are read from the API as they are consumed
+        so that the whole file is never held in memory. Raises `DoesNotExist`
+        if the file has no content.
+
+        If the file's content is cached, it is read from the cache instead;
+        otherwise it is added to the cache once it has all been read.
+        """
+        cache = self.content_cache
+        if cache is not None:
+            chunks = cache.iter_content(self.id, chunk_size)
+            if chunks is not None:
+                return chunks
+        path = '{}/content'.format(self.url_path)
+        try:
+            response = self.client.api_get(path, stream=True)
+        except requests.RequestException as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                raise DoesNotExist
+            reraise(APIError)
+        if cache is not None:
+            return self._iter_response_into_cache(response, chunk_size, cache)
+        return self._iter_response(response, chunk_size)
+
+    @staticmethod
+    def _iter_response(response, chunk_size):
+        try:
+            for chunk in response.iter_content(chunk_size):
+                yield chunk
+        except requests.RequestException:
+            reraise(APIError)
+        finally:
+            response.close()
+
+    def _iter_response_into_cache(self, response, chunk_size, cache):
+        # The cache entry is discarded unless every chunk is read.
+        with cache.writer(self.id) as f:
+            for chunk in self._iter_response(response, chunk_size):
+                f.write(chunk)
+                yield chunk
+
+    def download_to(self, destination, chunk_size=CHUNK_SIZE, checksum=None):
+        """
+        Streams the file's content to `destination`, either a path or a file
+        object opened for writing in binary mode, `chunk_size` bytes at a
+        time. A path is only replaced once the download has completed.
+
+        If `checksum` names a `hashlib` algorithm (e.g. `'sha256'`), the hex
+        digest of the content is computed along the way and returned.
+        """
+        digest = hashlib.new(checksum) if checksum is not None else None
+        chunks = self.iter_content(chunk_size)
+
+        def write(f):
+            for chunk in chunks:
+                f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+
+        if isinstance(destination, basestring):
+            with atomic_write(destination) as f:
+                write(f)
+        else:
+            write(destination)
+        return digest.hexdigest() if digest is not None else None
+
+    def download_resumable(self, path, chunk_size=CHUNK_SIZE, checksum=None, parts=1, attempts=3):
+        """
+        Downloads the file's content to `path` using Range requests, so that
+        a failed download carries on from where it stopped (whether retried
+        immediately, up to `attempts` times, or by a later call) instead of
+        starting again. With `parts` greater than one, that many byte ranges
+        are downloaded concurrently. See `ResumableDownload`.
+        """
+        download = ResumableDownload(self, path, chunk_size=chunk_size, parts=parts, attempts=attempts)
+        return download.run(checksum=checksum)
+
     @content.setter
     def content(self, value):
         path = '{}/content'.format(self.url_path)
+        self._discard_cached_content()
+        self._discard_indexed_content()
         try:
             self.client.api_put(path, data=value)
         except requests.RequestException:
             reraise(APIError)
+        index = self.client.content_index
+        if index is not None and self.type == 'SOURCE' and isinstance(value, str):
+            index.set(self.client.api_endpoint_url, hashlib.sha256(value).hexdigest(), self.id, len(value))
+
+    def upload_from(self, source, chunk_size=CHUNK_SIZE, progress=None):
+        """
+        Streams content to the file from `source`, without holding it all in
+        memory. `source` can be a path (which is memory-mapped), a file
+        object opened in binary mode, or an iterable of byte strings (sent
+        using chunked transfer encoding).
+
+        If given, `progress(bytes_sent, total_bytes)` is called as the content
+        is sent; `total_bytes` is `None` when the size isn't known up front.
+        Returns the number of bytes sent.
+
+        Streamed content can't be sent twice, so the upload isn't retried by
+        the client's retry policy. If the access token turns out to have
+        expired, content from a path or seekable file object is sent again
+        from the start once it has been refreshed; an iterable can't be, so
+        `APIError` is raised instead.
+        """
+        if isinstance(source, basestring):
+            with open(source, 'rb') as f:
+                length = os.fstat(f.fileno()).st_size
+                if not length:
+                    # An empty file can't be memory-mapped.
+                    return self._upload(ProgressReader(f, 0, progress, chunk_size))
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    return self._upload(ProgressReader(mapped, length, progress, chunk_size))
+                finally:
+                    mapped.close()
+        elif hasattr(source, 'read'):
+            try:
+                length = super_len(source) or None
+            except (IOError, OSError, AttributeError):
+                length = None
+            return self._upload(ProgressReader(source, length, progress, chunk_size))
+        else:
+            sent = [0]
+
+            def chunks():
+                for chunk in source:
+                    sent[0] += len(chunk)
+                    if progress is not None:
+                        progress(sent[0], None)
+                    yield chunk
+
+            self._upload(chunks())
+            return sent[0]
+
+    def _upload(self, body):
+        path = '{}/content'.format(self.url_path)
+        self._discard_cached_content()
+        self._discard_indexed_content()
+        try:
+            self.client.api_put(path, data=body)
+        except requests.RequestException:
+            reraise(APIError)
+        return getattr(body, 'bytes_read', None)
 
     def delete(self):
         try:
             self.client.api_delete(self.url_path)
         except requests.RequestException:
             reraise(APIError)
+        self._discard_cached_content()
+        self._discard_indexed_content()
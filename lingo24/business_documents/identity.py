@@ -0,0 +1,73 @@
+from __future__ import absolute_import
+
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+from .collections import BaseCollection
+
+
+class IdentityMap(object):
+    """
+    Maps each (type, id) pair to a single canonical model instance, so that
+    items fetched repeatedly through a client are represented by one shared
+    object which is updated in place when newer data arrives.
+
+    Instances are held by weak reference, and so are forgotten once nothing
+    else refers to them; the `max_size` most recently used instances are also
+    held strongly, so that they remain canonical while not in use.
+    """
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._instances = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._instances)
+
+    def merge(self, item):
+        """
+        Returns the canonical instance for `item`, updating it with the data
+        from `item` if one already exists. Items without an `id` are
+        returned unchanged.
+        """
+        item_id = getattr(item, 'id', None)
+        if item_id is None:
+            return item
+        key = (type(item), item_id)
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                instance = self._instances[key] = item
+            elif instance is not item:
+                self._update(instance, item)
+            self._recent.pop(key, None)
+            self._recent[key] = instance
+            while len(self._recent) > self.max_size:
+                self._recent.popitem(last=False)
+        return instance
+
+    @staticmethod
+    def _update(instance, item):
+        # Collections belonging to the instance (e.g. `project.jobs`) refer
+        # back to it, so they are kept rather than replaced.
+        for name, value in item.__dict__.items():
+            if not isinstance(getattr(instance, name, None), BaseCollection):
+                setattr(instance, name, value)
+
+
+def identity_mapped(make_item):
+    """
+    Decorates a collection's `make_item` method so that it returns the
+    canonical instance from the client's identity map, if it has one.
+    """
+    @functools.wraps(make_item)
+    def wrapper(self, **kwargs):
+        item = make_item(self, **kwargs)
+        identity_map = self.client.identity_map
+        if identity_map is not None:
+            item = identity_map.merge(item)
+        return item
+    return wrapper
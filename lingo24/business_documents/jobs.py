@@ -8,6 +8,45 @@ from .files import File, BaseFileCollection
 from .pricing import Price, TotalPrice, DP2
 
 
+# The related items of a Job that can be prefetched, mapped to the client
+# collection they belong to and the Job attribute holding their ID.
+JOB_RELATIONS = {
+    'service': ('services', 'service_id'),
+    'source_locale': ('locales', 'source_locale_id'),
+    'target_locale': ('locales', 'target_locale_id'),
+    'source_file': ('files', 'source_file_id'),
+    'target_file': ('files', 'target_file_id'),
+}
+
+
+def prefetch_job_relations(client, jobs, relations, workers=4):
+    """
+    Fetch the named related items of each of `jobs`, using up to `workers`
+    threads, and attach them to the jobs so that accessing them doesn't make
+    a request. Each distinct item is only fetched once. Items which can't be
+    fetched are not attached, so accessing them raises the error as usual.
+    """
+    wanted = {}
+    for job in jobs:
+        for relation in relations:
+            collection_name, id_attribute = JOB_RELATIONS[relation]
+            item_id = getattr(job, id_attribute)
+            if item_id is not None:
+                wanted.setdefault(collection_name, set()).add(item_id)
+
+    resolved = {}
+    for collection_name, item_ids in wanted.iteritems():
+        items, _ = getattr(client, collection_name).get_many(item_ids, workers=workers)
+        for item_id, item in items.iteritems():
+            resolved[(collection_name, item_id)] = item
+    for job in jobs:
+        for relation in relations:
+            collection_name, id_attribute = JOB_RELATIONS[relation]
+            item = resolved.get((collection_name, getattr(job, id_attribute)))
+            if item is not None:
+                job._related[relation] = item
+
+
 class Job(object):
     def __init__(self, collection, job_id, status, service_id, source_locale_id,
                  target_locale_id, source_file_id, target_file_id):
@@ -19,6 +58,8 @@ class Job(object):
         self.target_locale_id = target_locale_id
         self.source_file_id = source_file_id
         self.target_file_id = target_file_id
+        # Related items attached by `prefetch_job_relations`.
+        self._related = {}
 
         self.files = JobFileCollection(job=self, per_page=self.client.per_page)
 
@@ -50,25 +91,44 @@ class Job(object):
 
     @property
     def service(self):
+        if 'service' in self._related:
+            return self._related['service']
         return self.collection.client.services.get(self.service_id)
 
     @property
     def source_locale(self):
+        if 'source_locale' in self._related:
+            return self._related['source_locale']
         return self.collection.client.locales.get(self.source_locale_id)
 
     @property
     def target_locale(self):
+        if 'target_locale' in self._related:
+            return self._related['target_locale']
         return self.collection.client.locales.get(self.target_locale_id)
 
     @property
     def source_file(self):
+        if 'source_file' in self._related:
+            return self._related['source_file']
         return self.collection.client.files.get(self.source_file_id)
 
     @property
     def target_file(self):
+        """
+        The job's target file, or `None` if it has none yet. Once the job has
+        been translated, the file's content won't change, so it is marked as
+        final and may be kept in the client's content cache.
+        """
         if self.target_file_id is None:
             return None
-        return self.collection.client.files.get(self.target_file_id)
+        if 'target_file' in self._related:
+            target_file = self._related['target_file']
+        else:
+            target_file = self.collection.client.files.get(self.target_file_id)
+        if self.status == 'TRANSLATED':
+            target_file.content_final = True
+        return target_file
 
     @property
     def price(self):
@@ -80,7 +140,7 @@ class Job(object):
         try:
             response = self.collection.client.api_get_json(path)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 return None
             else:
                 reraise(APIError)
@@ -107,7 +167,7 @@ class Job(object):
         try:
             response = self.collection.client.api_get_json(path)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 return {}
             else:
                 reraise(APIError)
@@ -1,9 +1,12 @@
 from .collections import SortablePaginatableAddressableCollection
+from .identity import identity_mapped
 
 
 class LocaleCollection(SortablePaginatableAddressableCollection):
     url_path = 'locales/'
+    cache_responses = True
 
+    @identity_mapped
     def make_item(self, **kwargs):
         return Locale(
             locale_id=kwargs['id'],
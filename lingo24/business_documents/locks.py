@@ -0,0 +1,90 @@
+import errno
+import fcntl
+import os
+import threading
+
+
+class _SharedFileLock(object):
+    """
+    The state of the lock on one path, shared by every `FileLock` for that
+    path within the process.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.fd = None
+        self.count = 0
+
+
+_shared_locks = {}
+_shared_locks_lock = threading.Lock()
+
+
+def _shared_file_lock(path):
+    key = os.path.realpath(path)
+    with _shared_locks_lock:
+        shared = _shared_locks.get(key)
+        if shared is None:
+            shared = _shared_locks[key] = _SharedFileLock(path)
+        return shared
+
+
+class FileLock(object):
+    """
+    An exclusive lock, shared between processes, backed by `flock` on the
+    file at `path` (which is created if necessary). It can also be shared by
+    threads within a process, and is used as a context manager:
+
+        with FileLock('/tmp/lingo24.lock'):
+            ...
+
+    Within a process, every `FileLock` for the same path is the same
+    reentrant lock, so a thread holding it can take it again (`flock` would
+    otherwise block on the second file descriptor).
+    """
+    def __init__(self, path):
+        self.path = path
+        self._shared = _shared_file_lock(path)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self, blocking=True):
+        shared = self._shared
+        if not shared.thread_lock.acquire(blocking):
+            return False
+        if shared.count:
+            shared.count += 1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            flags = fcntl.LOCK_EX
+            if not blocking:
+                flags |= fcntl.LOCK_NB
+            fcntl.flock(fd, flags)
+        except IOError as exc:
+            os.close(fd)
+            shared.thread_lock.release()
+            if blocking or exc.errno not in (errno.EAGAIN, errno.EACCES):
+                raise
+            return False
+        shared.fd = fd
+        shared.count = 1
+        return True
+
+    def release(self):
+        shared = self._shared
+        shared.count -= 1
+        try:
+            if not shared.count:
+                fd, shared.fd = shared.fd, None
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                finally:
+                    os.close(fd)
+        finally:
+            shared.thread_lock.release()
@@ -6,14 +6,17 @@ import requests
 
 from ..exceptions import APIError, InvalidState, reraise
 from .collections import SortablePaginatableAddressableCollection, PaginatableAddressableCollection
+from .downloads import CHUNK_SIZE, download_job_targets
 from .files import File, BaseFileCollection
-from .jobs import Job
+from .identity import identity_mapped
+from .jobs import JOB_RELATIONS, Job, prefetch_job_relations
 from .pricing import Charge, Price, TotalPrice, DP2
 
 
 class ProjectCollection(SortablePaginatableAddressableCollection):
     url_path = 'projects/'
 
+    @identity_mapped
     def make_item(self, **kwargs):
         return Project(
             client=self.client,
@@ -95,7 +98,7 @@ class Project(object):
         try:
             response = self.client.api_get_json(path)
         except requests.RequestException as exc:
-            if exc.response.status_code == 404:
+            if exc.response is not None and exc.response.status_code == 404:
                 return None
             else:
                 reraise(APIError)
@@ -159,6 +162,21 @@ class Project(object):
             reraise(APIError)
         self.status = 'IN_PROGRESS'
 
+    def download_targets(self, directory, workers=4, verify=False, chunk_size=CHUNK_SIZE):
+        """
+        Downloads the target file of each of the project's jobs to
+        `directory`, under a subdirectory for its target locale (e.g.
+        `fr_FR/Test-fr_FR.txt`). The jobs' target files and locales are looked
+        up, and the files downloaded, using pools of `workers` threads; each
+        file is only replaced once it has been downloaded completely.
+
+        Files already downloaded by an earlier call are skipped if they still
+        have the size (and, if `verify` is set, the SHA-256 checksum) recorded
+        at the time. Returns a `TargetDownloadResult`.
+        """
+        jobs = self.jobs.prefetch_related('target_file', 'target_locale', workers=workers)
+        return download_job_targets(jobs, directory, workers=workers, verify=verify, chunk_size=chunk_size)
+
 
 class ProjectFileCollection(BaseFileCollection, PaginatableAddressableCollection):
     def __init__(self, project, *args, **kwargs):
@@ -205,6 +223,8 @@ class ProjectFileCollection(BaseFileCollection, PaginatableAddressableCollection
 class ProjectJobCollection(PaginatableAddressableCollection):
     def __init__(self, project, *args, **kwargs):
         self.project = project
+        self.related = kwargs.pop('related', ())
+        self.related_workers = kwargs.pop('related_workers', 4)
         client = kwargs.pop('client', project.client)
         super(ProjectJobCollection, self).__init__(client=client, *args, **kwargs)
 
@@ -213,8 +233,38 @@ class ProjectJobCollection(PaginatableAddressableCollection):
         return '{}/jobs'.format(self.project.url_path)
 
     def clone(self):
-        return super(ProjectJobCollection, self).clone(project=self.project)
+        return super(ProjectJobCollection, self).clone(
+            project=self.project,
+            related=self.related,
+            related_workers=self.related_workers,
+        )
 
+    def _page_items(self, response):
+        jobs = super(ProjectJobCollection, self)._page_items(response)
+        if self.related:
+            prefetch_job_relations(self.client, jobs, self.related, self.related_workers)
+        return jobs
+
+    def prefetch_related(self, *relations, **kwargs):
+        """
+        Returns a copy of this collection which, for each page of jobs,
+        fetches the named related items (any of 'service', 'source_locale',
+        'target_locale', 'source_file' and 'target_file') up front, using up
+        to `workers` threads. Accessing those properties of the jobs then
+        doesn't make a request.
+        """
+        workers = kwargs.pop('workers', 4)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: {}'.format(', '.join(kwargs)))
+        for relation in relations:
+            if relation not in JOB_RELATIONS:
+                raise ValueError('Unknown relation: {}'.format(relation))
+        clone = self.clone()
+        clone.related = tuple(relations)
+        clone.related_workers = workers
+        return clone
+
+    @identity_mapped
     def make_item(self, **kwargs):
         return Job(
             collection=self,
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+
+from .locks import FileLock
+
+
+class RateLimiter(object):
+    """
+    A token bucket: up to `capacity` requests may be made in a burst, after
+    which requests are limited to `rate` per second. A Client given a rate
+    limiter calls its `acquire` method before sending each request.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('Rate must be positive')
+        if capacity is not None and capacity < 1:
+            raise ValueError('Capacity must be at least 1')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+
+    def _consume(self, state, tokens, now):
+        """
+        Takes `tokens` from the bucket described by `state` (a tuple of the
+        number of tokens available and the time it was last updated). Returns
+        the new state and the number of seconds to wait before trying again
+        (zero if the tokens were taken).
+        """
+        available, updated = state
+        available = min(self.capacity, available + (now - updated) * self.rate)
+        if available >= tokens:
+            return (available - tokens, now), 0
+        return (available, now), (tokens - available) / self.rate
+
+    @abstractmethod
+    def _try_acquire(self, tokens):
+        pass  # pragma: no cover
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` requests may be made.
+        """
+        if tokens > self.capacity:
+            raise ValueError('Cannot acquire more tokens than the capacity')
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class TokenBucket(RateLimiter):
+    """
+    A thread-safe token bucket shared by all threads in a process.
+    """
+    def __init__(self, *args, **kwargs):
+        super(TokenBucket, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._state = None
+
+    def _try_acquire(self, tokens):
+        with self._lock:
+            now = time.time()
+            state = self._state or (self.capacity, now)
+            self._state, wait = self._consume(state, tokens, now)
+        return wait
+
+
+class FileTokenBucket(RateLimiter):
+    """
+    A token bucket whose state is kept in the file at `path`, so that every
+    process on the machine which uses the same path shares a single limit.
+    """
+    def __init__(self, path, *args, **kwargs):
+        super(FileTokenBucket, self).__init__(*args, **kwargs)
+        self.path = path
+        self._lock = FileLock('{}.lock'.format(path))
+
+    def _read_state(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.load(f)
+            return data['tokens'], data['updated']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_state(self, state):
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            json.dump({'tokens': state[0], 'updated': state[1]}, f)
+        os.rename(temp_path, self.path)
+
+    def _try_acquire(self, tokens):
+        with self._lock:
+            now = time.time()
+            state = self._read_state() or (self.capacity, now)
+            state, wait = self._consume(state, tokens, now)
+            self._write_state(state)
+        return wait
@@ -0,0 +1,80 @@
+import random
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+
+class RetryPolicy(object):
+    """
+    Determines which failed API requests a Client retries, and how long it
+    waits between attempts.
+
+    Requests that fail with one of `status_codes` (by default 429 and the
+    transient 5xx errors) or with a connection error are retried up to
+    `max_retries` times, using exponential backoff with full jitter. A
+    `Retry-After` header sent by the server takes precedence over the
+    backoff. Only idempotent methods are retried unless `retry_post` is set,
+    and no retry is attempted if it would take the call past
+    `max_total_time` seconds.
+    """
+    IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'))
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30,
+                 status_codes=(429, 502, 503, 504), retry_post=False,
+                 max_total_time=None, respect_retry_after=True):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_codes = frozenset(status_codes)
+        self.retry_post = retry_post
+        self.max_total_time = max_total_time
+        self.respect_retry_after = respect_retry_after
+
+    def allows_method(self, method):
+        method = method.upper()
+        return method in self.IDEMPOTENT_METHODS or (self.retry_post and method == 'POST')
+
+    def is_retryable_response(self, response):
+        return response.status_code in self.status_codes
+
+    def backoff(self, attempt):
+        """
+        Returns a random delay between zero and the exponential backoff for
+        the given (zero-based) attempt number.
+        """
+        ceiling = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def retry_after(self, response):
+        """
+        Returns the number of seconds requested by the response's
+        `Retry-After` header, or `None` if there is no valid header.
+        """
+        value = response.headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0, mktime_tz(parsedate_tz(value)) - time.time())
+        except TypeError:
+            return None
+
+    def next_delay(self, attempt, started, response=None):
+        """
+        Returns the number of seconds to wait before retrying a call that
+        `started` at the given time and has failed `attempt + 1` times, or
+        `None` if it should not be retried.
+        """
+        if attempt >= self.max_retries:
+            return None
+        delay = None
+        if response is not None and self.respect_retry_after:
+            delay = self.retry_after(response)
+        if delay is None:
+            delay = self.backoff(attempt)
+        if self.max_total_time is not None:
+            if time.time() - started + delay > self.max_total_time:
+                return None
+        return delay
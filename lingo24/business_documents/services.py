@@ -1,9 +1,12 @@
 from .collections import SortablePaginatableAddressableCollection
+from .identity import identity_mapped
 
 
 class ServiceCollection(SortablePaginatableAddressableCollection):
     url_path = 'services/'
+    cache_responses = True
 
+    @identity_mapped
     def make_item(self, **kwargs):
         return Service(
             service_id=kwargs['id'],
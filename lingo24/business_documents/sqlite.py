@@ -0,0 +1,19 @@
+from __future__ import absolute_import
+
+import sqlite3
+
+
+def connect_sqlite(path, timeout=30):
+    """
+    Opens a connection to the SQLite database at `path` in WAL mode, so that
+    it can be shared between processes without readers blocking the writer.
+    Connections can't be shared between threads, so one should be opened for
+    each operation. Transactions are managed explicitly.
+    """
+    connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    try:
+        connection.execute('PRAGMA journal_mode=WAL')
+    except:
+        connection.close()
+        raise
+    return connection
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from ..exceptions import APIError
+from .deadline import propagate_deadline
+
+
+class UploadResult(object):
+    """
+    The outcome of uploading one item with `FileCollection.bulk_upload`: the
+    `file` created (if any), the number of bytes sent, whether an existing
+    file with the same content was `reused` instead, and the `error` which
+    stopped it completing (if any).
+    """
+    def __init__(self, item, name, file_obj=None, bytes_sent=0, error=None, reused=False):
+        self.item = item
+        self.name = name
+        self.file = file_obj
+        self.bytes_sent = bytes_sent
+        self.error = error
+        self.reused = reused
+
+    def __repr__(self):
+        if self.error is not None:
+            return '<UploadResult {}: {!r}>'.format(self.name, self.error)
+        return '<UploadResult {}: {!r}>'.format(self.name, self.file)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BulkUploadResult(object):
+    """
+    The outcome of `FileCollection.bulk_upload`: an `UploadResult` for each
+    item (in the order given), along with a summary of the throughput.
+    """
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return '<BulkUploadResult: {} uploaded, {} failed, {:.0f} bytes/s>'.format(
+            len(self.files),
+            len(self.errors),
+            self.bytes_per_second,
+        )
+
+    @property
+    def files(self):
+        return [result.file for result in self.results if result.ok]
+
+    @property
+    def errors(self):
+        return [(result.item, result.error) for result in self.results if not result.ok]
+
+    @property
+    def reused(self):
+        return [result.file for result in self.results if result.ok and result.reused]
+
+    @property
+    def bytes_sent(self):
+        return sum(result.bytes_sent for result in self.results)
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_sent / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def files_per_second(self):
+        return len(self.files) / self.elapsed if self.elapsed else 0.0
+
+
+def item_name_and_source(item):
+    """
+    Returns the file name and content source of a `bulk_upload` item, which
+    is either a path or a `(name, source)` tuple.
+    """
+    if isinstance(item, basestring):
+        return os.path.basename(item), item
+    name, source = item
+    return name, source
+
+
+def bulk_upload(upload, items, workers=4):
+    """
+    Calls `upload(result, source)` for each of `items` on a pool of `workers`
+    threads, returning a `BulkUploadResult`. `upload` sets the `file`,
+    `bytes_sent` and `reused` of the item's `UploadResult`, and any `APIError`
+    (or error reading the source) it raises is recorded against the item.
+
+    Items are taken from `items` only as workers become free, so that no
+    more than a few are open at any one time.
+    """
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def queued():
+        for index, item in enumerate(items):
+            slots.acquire()
+            yield index, item
+
+    def run(entry):
+        index, item = entry
+        try:
+            name, source = item_name_and_source(item)
+            result = UploadResult(item, name)
+            try:
+                upload(result, source)
+            except (APIError, IOError, OSError) as exc:
+                result.error = exc
+            return index, result
+        finally:
+            slots.release()
+
+    started = time.time()
+    results = {}
+    pool = ThreadPool(workers)
+    try:
+        for index, result in pool.imap_unordered(propagate_deadline(run), queued()):
+            results[index] = result
+    finally:
+        pool.terminate()
+    elapsed = time.time() - started
+    return BulkUploadResult([results[index] for index in sorted(results)], elapsed)
@@ -13,6 +13,29 @@ class APIError(IOError):
     pass
 
 
+class DeadlineExceeded(APIError):
+    """
+    Raised when an operation's deadline (see `Client.deadline`) passes before
+    it has finished making its API requests.
+    """
+
+
+class PaginationDrift(Exception):
+    """
+    Raised when the number of items in a collection changes while it is being
+    scanned, meaning that items may have been skipped or repeated.
+    """
+    def __init__(self, expected, actual):
+        super(PaginationDrift, self).__init__(
+            'Collection size changed during scan (expected {}, found {})'.format(
+                expected,
+                actual,
+            )
+        )
+        self.expected = expected
+        self.actual = actual
+
+
 def reraise(exc_type):
     """
     Reraise the current exception (from `sys.exc_info`), but change its type
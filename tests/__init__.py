@@ -1,9 +1,21 @@
+from .async_client import *
 from .auth import *
+from .cache import *
 from .client import *
+from .content_cache import *
+from .content_index import *
+from .deadline import *
 from .domains import *
+from .downloads import *
 from .files import *
+from .identity import *
 from .jobs import *
 from .locales import *
+from .locks import *
 from .pricing import *
 from .projects import *
+from .ratelimit import *
+from .retry import *
 from .services import *
+from .singleflight import *
+from .sqlite import *
@@ -0,0 +1,91 @@
+import json
+
+import requests
+
+from lingo24.business_documents import AsyncClient, Authenticator
+from lingo24.business_documents.locales import Locale
+
+from .base import BaseTestCase, mock_session
+
+
+class AsyncClientTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = AsyncClient(authenticator, 'demo', per_page=4, workers=2)
+
+    def tearDown(self):
+        self.client.close()
+
+    @mock_session
+    def test_api_get_json_async(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=json.dumps({'a': 1}))
+        m.get('https://api-demo.lingo24.com/docs/v1/bar', text=json.dumps({'b': 2}))
+        foo = self.client.api_get_json_async('foo')
+        bar = self.client.api_get_json_async('bar')
+        self.assertDictEqual(foo.get(), {'a': 1})
+        self.assertDictEqual(bar.get(), {'b': 2})
+
+    @mock_session
+    def test_api_post_json_async(self, m):
+        def text_callback(request, context):
+            self.assertDictEqual(request.json(), {'x': 'y'})
+            return json.dumps({'id': 1})
+
+        m.post('https://api-demo.lingo24.com/docs/v1/foo', text=text_callback)
+        result = self.client.api_post_json_async({'x': 'y'}, 'foo')
+        self.assertDictEqual(result.get(), {'id': 1})
+
+    @mock_session
+    def test_api_request_async_error(self, m):
+        m.delete('https://api-demo.lingo24.com/docs/v1/foo', status_code=500)
+        result = self.client.api_delete_async('foo')
+        self.assertRaises(requests.HTTPError, result.get)
+
+    @mock_session
+    def test_get_async(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/123', text=json.dumps({
+            'id': 123,
+            'name': 'aaa',
+            'language': 'AAA',
+            'country': 'xxx',
+        }))
+        result = self.client.get_async(self.client.locales, 123)
+        self.assertEqual(result.get(), Locale(123, 'aaa', 'AAA', 'xxx'))
+
+    @mock_session
+    def test_list_async(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=0&size=4', text=json.dumps({
+            'content': [
+                {'id': 1, 'name': 'aaa', 'language': 'AAA', 'country': 'xxx'},
+            ],
+            'page': {
+                'size': 1,
+                'totalElements': 1,
+                'totalPages': 1,
+                'number': 0,
+            }
+        }))
+        result = self.client.list_async(self.client.locales)
+        self.assertListEqual(result.get(), [Locale(1, 'aaa', 'AAA', 'xxx')])
+
+    @mock_session
+    def test_submit(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='xxx')
+        file_obj = self.client.files.make_item(id=1, name='Test.txt', type='AAA')
+        result = self.client.submit(getattr, file_obj, 'content')
+        self.assertEqual(result.get(), 'xxx')
+
+    def test_pool_maxsize(self):
+        self.assertEqual(self.client.pool_maxsize, 2)
+
+    def test_close(self):
+        pool = self.client.pool
+        self.assertIs(self.client.pool, pool)
+        self.client.close()
+        self.assertIsNot(self.client.pool, pool)
+
+    def test_context_manager(self):
+        with self.client as client:
+            client.pool
+        self.assertIsNone(self.client._pool)
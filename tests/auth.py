@@ -1,14 +1,24 @@
 import json
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
 
 import requests
 import requests_mock
 
-from mock import Mock, patch
+from mock import MagicMock, Mock, patch
 
 from lingo24.business_documents.auth import (
     Authenticator,
     DictAuthenticationStore,
+    FileAuthenticationStore,
+    SQLiteAuthenticationStore,
     )
+from lingo24.business_documents.locks import FileLock
 from lingo24.exceptions import APIError
 
 from .base import BaseTestCase
@@ -18,6 +28,16 @@ mock_time = Mock()
 mock_time.return_value = 10000
 
 
+class CountingAuthenticationStore(DictAuthenticationStore):
+    def __init__(self, *args, **kwargs):
+        super(CountingAuthenticationStore, self).__init__(*args, **kwargs)
+        self.get_count = 0
+
+    def get(self):
+        self.get_count += 1
+        return super(CountingAuthenticationStore, self).get()
+
+
 class AuthenticatorTestCase(BaseTestCase):
     def test_ease_endpoint_url(self):
         default_authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
@@ -104,6 +124,24 @@ class AuthenticatorTestCase(BaseTestCase):
         authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
         self.assertRaises(ValueError, lambda: authenticator.access_token)
 
+    @requests_mock.mock()
+    def test_request_access_token_timeout(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?code=zzz', text=json.dumps({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_in': 123,
+        }))
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback',
+                                      connect_timeout=2, read_timeout=5)
+        authenticator.request_access_token('zzz')
+        self.assertEqual(m.request_history[0].timeout, (2, 5))
+
+    @requests_mock.mock()
+    def test_request_access_token_timeout_error(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?code=zzz', exc=requests.exceptions.ConnectTimeout)
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        self.assertRaises(APIError, authenticator.request_access_token, 'zzz')
+
     @requests_mock.mock()
     def test_request_access_token_date_header(self, m):
         m.post('https://api.lingo24.com/docs/v1/oauth2/access?code=zzz', text=json.dumps({
@@ -138,6 +176,19 @@ class AuthenticatorTestCase(BaseTestCase):
             'expires_at': 10123,
         })
 
+    def test_request_access_token_session(self):
+        session = Mock()
+        session.post.return_value.headers = {}
+        session.post.return_value.json.return_value = {
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_in': 123,
+        }
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', session=session)
+        authenticator.request_access_token('zzz')
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(authenticator.store.get()['access_token'], 'aaa')
+
     @requests_mock.mock()
     def test_request_access_token_server_error(self, m):
         m.post('https://api.lingo24.com/docs/v1/oauth2/access?code=zzz', status_code=500)
@@ -201,3 +252,325 @@ class AuthenticatorTestCase(BaseTestCase):
         })
         authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
         self.assertRaises(APIError, authenticator.refresh_access_token)
+
+    def test_refresh_access_token_already_refreshed(self):
+        store = DictAuthenticationStore({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
+        authenticator._request_oauth2_access = Mock()
+        authenticator.refresh_access_token(expired_token='aaa')
+        self.assertFalse(authenticator._request_oauth2_access.called)
+        authenticator.refresh_access_token(expired_token='ccc')
+        authenticator._request_oauth2_access.assert_called_once_with(
+            expected_credentials={'access_token': 'ccc', 'refresh_token': 'ddd'},
+            grant_type='refresh_token',
+            refresh_token='ddd',
+        )
+
+    @requests_mock.mock()
+    def test_refresh_access_token_get_set_store(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123
+        }))
+
+        class GetSetStore(object):
+            data = {'access_token': 'aaa', 'refresh_token': 'bbb'}
+
+            def get(self):
+                return self.data
+
+            def set(self, value):
+                self.data = value
+
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', GetSetStore())
+        authenticator.refresh_access_token(expired_token='aaa')
+        self.assertEqual(authenticator.store.get()['access_token'], 'ccc')
+        self.assertEqual(authenticator.access_token, 'ccc')
+
+    def test_refresh_access_token_single_flight(self):
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
+
+        def request_oauth2_access(**kwargs):
+            time.sleep(0.05)
+            store.set({'access_token': 'ccc', 'refresh_token': 'ddd'})
+
+        authenticator._request_oauth2_access = Mock(side_effect=request_oauth2_access)
+        threads = [
+            threading.Thread(target=authenticator.refresh_access_token, kwargs={'expired_token': 'aaa'})
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(authenticator._request_oauth2_access.call_count, 1)
+        self.assertEqual(store.get()['access_token'], 'ccc')
+
+    def test_refresh_lock(self):
+        lock = MagicMock()
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, refresh_lock=lock)
+        authenticator._request_oauth2_access = Mock()
+        authenticator.refresh_access_token()
+        self.assertTrue(lock.__enter__.called)
+        self.assertTrue(lock.__exit__.called)
+
+    @patch('time.time', mock_time)
+    def test_access_token_expiring(self):
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'expires_at': 10050,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
+        self.assertFalse(authenticator.access_token_expiring)
+        authenticator.refresh_ahead = 60
+        self.assertTrue(authenticator.access_token_expiring)
+        authenticator.refresh_ahead = 30
+        self.assertFalse(authenticator.access_token_expiring)
+
+    @patch('time.time', mock_time)
+    def test_access_token_expired_clock_offset(self):
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'expires_at': 10050,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
+        self.assertFalse(authenticator.access_token_expired)
+        authenticator.clock_offset = 60
+        self.assertTrue(authenticator.access_token_expired)
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_request_access_token_clock_offset(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?code=zzz', text=json.dumps({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_in': 123,
+        }), headers={'Date': 'Thu, 1 Jan 1970 02:46:50 GMT'})
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.request_access_token('zzz')
+        self.assertEqual(authenticator.clock_offset, 10)
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_access_token_refresh_ahead(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123
+        }))
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_at': 10030,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, refresh_ahead=60)
+        with authenticator.refresh_lock:
+            self.assertEqual(authenticator.access_token, 'aaa')
+            thread = authenticator._background_refresh
+            self.assertIsNotNone(thread)
+        thread.join()
+        self.assertEqual(authenticator.access_token, 'ccc')
+        self.assertIsNone(authenticator._background_refresh)
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_access_token_refresh_ahead_error(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', status_code=500)
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_at': 10030,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, refresh_ahead=60)
+        with authenticator.refresh_lock:
+            self.assertEqual(authenticator.access_token, 'aaa')
+            thread = authenticator._background_refresh
+        thread.join()
+        self.assertEqual(store.get()['access_token'], 'aaa')
+
+    @patch('time.time', mock_time)
+    def test_cache_credentials(self):
+        store = CountingAuthenticationStore({
+            'access_token': 'aaa',
+            'expires_at': 15000,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, cache_credentials=True)
+        for _ in range(5):
+            self.assertEqual(authenticator.access_token, 'aaa')
+        self.assertEqual(store.get_count, 1)
+        store.data = {'access_token': 'bbb', 'expires_at': 15000}
+        self.assertEqual(authenticator.access_token, 'aaa')
+        authenticator.invalidate()
+        self.assertEqual(authenticator.access_token, 'bbb')
+        self.assertEqual(store.get_count, 2)
+
+    @patch('time.time', mock_time)
+    def test_cache_credentials_disabled(self):
+        store = CountingAuthenticationStore({
+            'access_token': 'aaa',
+            'expires_at': 15000,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store)
+        authenticator.access_token
+        self.assertEqual(store.get_count, 2)
+
+    @patch('time.time', mock_time)
+    def test_cache_credentials_expired_in_cache(self):
+        store = CountingAuthenticationStore({
+            'access_token': 'aaa',
+            'expires_at': 5000,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, cache_credentials=True)
+        authenticator._credentials()
+        # Another process has already refreshed the token.
+        store.data = {'access_token': 'bbb', 'expires_at': 15000}
+        self.assertEqual(authenticator.access_token, 'bbb')
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_cache_credentials_write_through(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123
+        }))
+        store = CountingAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_at': 5000,
+        })
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, cache_credentials=True)
+        self.assertEqual(authenticator.access_token, 'ccc')
+        self.assertEqual(store.get()['access_token'], 'ccc')
+        get_count = store.get_count
+        self.assertEqual(authenticator.access_token, 'ccc')
+        self.assertEqual(store.get_count, get_count)
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_refresh_access_token_stale(self, m):
+        store = DictAuthenticationStore({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_at': 5000,
+        })
+
+        def text_callback(request, context):
+            # Another process stores a newer token while this refresh is in
+            # flight.
+            store.set({'access_token': 'xxx', 'refresh_token': 'yyy', 'expires_at': 20000})
+            return json.dumps({
+                'access_token': 'ccc',
+                'refresh_token': 'ddd',
+                'expires_in': 123
+            })
+
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=text_callback)
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store, cache_credentials=True)
+        authenticator.refresh_access_token()
+        self.assertEqual(store.get()['access_token'], 'xxx')
+        self.assertEqual(authenticator.access_token, 'xxx')
+
+
+class AuthenticationStoreTestCase(BaseTestCase):
+    def test_dict_compare_and_set(self):
+        store = DictAuthenticationStore({'access_token': 'aaa'})
+        self.assertFalse(store.compare_and_set({'access_token': 'bbb'}, {'access_token': 'ccc'}))
+        self.assertDictEqual(store.get(), {'access_token': 'aaa'})
+        self.assertTrue(store.compare_and_set({'access_token': 'aaa'}, {'access_token': 'ccc'}))
+        self.assertDictEqual(store.get(), {'access_token': 'ccc'})
+
+
+class FileAuthenticationStoreTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'auth.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_empty(self):
+        self.assertDictEqual(FileAuthenticationStore(self.path).get(), {})
+
+    def test_set(self):
+        FileAuthenticationStore(self.path).set({'access_token': 'aaa'})
+        self.assertDictEqual(FileAuthenticationStore(self.path).get(), {'access_token': 'aaa'})
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+        self.assertListEqual(sorted(os.listdir(self.directory)), ['auth.json', 'auth.json.lock'])
+
+    def test_compare_and_set(self):
+        store = FileAuthenticationStore(self.path)
+        self.assertTrue(store.compare_and_set({}, {'access_token': 'aaa'}))
+        self.assertFalse(store.compare_and_set({'access_token': 'bbb'}, {'access_token': 'ccc'}))
+        self.assertTrue(store.compare_and_set({'access_token': 'aaa'}, {'access_token': 'ccc'}))
+        self.assertDictEqual(store.get(), {'access_token': 'ccc'})
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_refresh_lock(self, m):
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123,
+        }))
+        store = FileAuthenticationStore(self.path)
+        store.set({
+            'access_token': 'aaa',
+            'refresh_token': 'bbb',
+            'expires_at': 5000,
+        })
+        # The store's own lock file, which the store also takes while the
+        # refresh lock is held.
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback', store,
+                                      refresh_lock=FileLock(self.path + '.lock'))
+        results = []
+        thread = threading.Thread(target=lambda: results.append(authenticator.access_token))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertListEqual(results, ['ccc'])
+        self.assertEqual(store.get()['access_token'], 'ccc')
+
+
+class SQLiteAuthenticationStoreTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'auth.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_empty(self):
+        self.assertDictEqual(SQLiteAuthenticationStore(self.path).get(), {})
+
+    def test_set(self):
+        SQLiteAuthenticationStore(self.path).set({'access_token': 'aaa'})
+        self.assertDictEqual(SQLiteAuthenticationStore(self.path).get(), {'access_token': 'aaa'})
+        self.assertDictEqual(SQLiteAuthenticationStore(self.path, key='other').get(), {})
+
+    def test_wal_mode(self):
+        SQLiteAuthenticationStore(self.path)
+        connection = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        finally:
+            connection.close()
+
+    def test_compare_and_set(self):
+        store = SQLiteAuthenticationStore(self.path)
+        self.assertTrue(store.compare_and_set({}, {'access_token': 'aaa'}))
+        self.assertFalse(store.compare_and_set({'access_token': 'bbb'}, {'access_token': 'ccc'}))
+        self.assertTrue(store.compare_and_set({'access_token': 'aaa'}, {'access_token': 'ccc'}))
+        self.assertDictEqual(store.get(), {'access_token': 'ccc'})
@@ -1,6 +1,9 @@
+import functools
 import urlparse
 from unittest import TestCase
 
+import requests_mock
+
 
 class BaseTestCase(TestCase):
     def assertURLEqual(self, first, second, msg=None):
@@ -15,3 +18,44 @@ class BaseTestCase(TestCase):
         first_qsl = urlparse.parse_qsl(first_parsed.query)
         second_qsl = urlparse.parse_qsl(second_parsed.query)
         self.assertListEqual(sorted(first_qsl), sorted(second_qsl), msg=msg)
+
+
+class SessionMock(requests_mock.Adapter):
+    """
+    A mock transport mounted directly on `session`. Unlike
+    `requests_mock.mock()`, which swaps the session's methods around each
+    request, it can safely be used by several threads at once.
+    """
+    def __init__(self, session, **kwargs):
+        super(SessionMock, self).__init__(**kwargs)
+        session.mount('https://', self)
+        session.mount('http://', self)
+
+    def request(self, method, url, **kwargs):
+        return self.register_uri(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def mock_session(test):
+    """
+    Decorates a test method to be passed a `SessionMock` on the test case's
+    client session, for tests which make requests from several threads.
+    """
+    @functools.wraps(test)
+    def wrapper(self, *args, **kwargs):
+        return test(self, SessionMock(self.client.api_session), *args, **kwargs)
+    return wrapper
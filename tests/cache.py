@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import requests_mock
+from mock import Mock, patch
+
+from lingo24.business_documents import (
+    Authenticator,
+    Client,
+    ResponseCache,
+    SQLiteResponseCache,
+    )
+from lingo24.business_documents.locales import Locale
+from lingo24.exceptions import DoesNotExist
+
+from .base import BaseTestCase
+
+
+class ResponseCacheTestCase(BaseTestCase):
+    def setUp(self):
+        patcher = patch('time.time')
+        self.time = patcher.start()
+        self.time.return_value = 10000
+        self.addCleanup(patcher.stop)
+
+    def test_fetch(self):
+        cache = ResponseCache()
+        loader = Mock(return_value={'id': 1})
+        self.assertDictEqual(cache.fetch('locales/', 'locales/1', loader), {'id': 1})
+        self.assertDictEqual(cache.fetch('locales/', 'locales/1', loader), {'id': 1})
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_fetch_error(self):
+        cache = ResponseCache()
+        loader = Mock(side_effect=DoesNotExist)
+        self.assertRaises(DoesNotExist, cache.fetch, 'locales/', 'locales/1', loader)
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=10, ttls={'locales/': 100, 'services': None})
+        self.assertEqual(cache.ttl_for('domains/'), 10)
+        self.assertEqual(cache.ttl_for('locales/'), 100)
+        self.assertIsNone(cache.ttl_for('services/'))
+        cache.set('domains/1', 'aaa')
+        cache.set('locales/1', 'bbb')
+        self.time.return_value = 10050
+        self.assertEqual(cache.get('domains/1', cache.ttl_for('domains/')), (False, None))
+        self.assertEqual(cache.get('locales/1', cache.ttl_for('locales/')), (True, 'bbb'))
+        self.assertEqual(cache.get('locales/1', None), (True, 'bbb'))
+
+    def test_stale_while_revalidate(self):
+        cache = ResponseCache(ttl=10, stale_while_revalidate=True)
+        cache.set('locales/1', 'aaa')
+        self.time.return_value = 10050
+        revalidated = threading.Event()
+
+        def loader():
+            revalidated.wait()
+            return 'bbb'
+
+        self.assertEqual(cache.fetch('locales/', 'locales/1', loader), 'aaa')
+        self.assertEqual(cache.fetch('locales/', 'locales/1', loader), 'aaa')
+        self.assertSetEqual(cache._revalidating, set(['locales/1']))
+        self.assertEqual(cache.hits, 2)
+        revalidated.set()
+        while cache._revalidating:
+            pass
+        self.assertEqual(cache.fetch('locales/', 'locales/1', loader), 'bbb')
+
+    def test_stale_while_revalidate_error(self):
+        cache = ResponseCache(ttl=10, stale_while_revalidate=True)
+        cache.set('locales/1', 'aaa')
+        self.time.return_value = 10050
+        self.assertEqual(cache.fetch('locales/', 'locales/1', Mock(side_effect=DoesNotExist)), 'aaa')
+        while cache._revalidating:
+            pass
+        self.assertEqual(cache._lookup('locales/1'), (True, 'aaa', 10000))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), (True, 1))
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('c'), (True, 3))
+
+    def test_clear(self):
+        cache = ResponseCache()
+        cache.set('a', 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class SQLiteResponseCacheTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.db')
+        patcher = patch('time.time')
+        self.time = patcher.start()
+        self.time.return_value = 10000
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persistence(self):
+        cache = SQLiteResponseCache(self.path)
+        cache.set('locales/1', {'id': 1})
+        self.time.return_value = 10001
+        cache.set('locales/2', {'id': 2})
+        loaded = SQLiteResponseCache(self.path)
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded._lookup('locales/1'), (True, {'id': 1}, 10000))
+        self.assertEqual(loaded._lookup('locales/2'), (True, {'id': 2}, 10001))
+
+    def test_load_stale(self):
+        SQLiteResponseCache(self.path).set('locales/1', {'id': 1})
+        self.time.return_value = 20000
+        cache = SQLiteResponseCache(self.path, ttl=10)
+        loader = Mock(return_value={'id': 1, 'name': 'aaa'})
+        self.assertDictEqual(cache.fetch('locales/', 'locales/1', loader), {'id': 1})
+        while cache._revalidating:
+            pass
+        self.assertEqual(loader.call_count, 1)
+        self.assertDictEqual(SQLiteResponseCache(self.path)._lookup('locales/1')[1], {'id': 1, 'name': 'aaa'})
+
+    def test_max_entries(self):
+        cache = SQLiteResponseCache(self.path)
+        for i in range(3):
+            self.time.return_value = 10000 + i
+            cache.set('locales/{}'.format(i), i)
+        loaded = SQLiteResponseCache(self.path, max_entries=2)
+        self.assertEqual(loaded.get('locales/0'), (False, None))
+        self.assertEqual(loaded.get('locales/1'), (True, 1))
+        self.assertEqual(loaded.get('locales/2'), (True, 2))
+        self.assertEqual(len(SQLiteResponseCache(self.path)), 2)
+
+    def test_clear(self):
+        cache = SQLiteResponseCache(self.path)
+        cache.set('locales/1', 1)
+        cache.clear()
+        self.assertEqual(len(SQLiteResponseCache(self.path)), 0)
+
+
+class ClientResponseCacheTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.cache = ResponseCache()
+        self.client = Client(authenticator, 'demo', per_page=4, response_cache=self.cache)
+
+    @requests_mock.mock()
+    def test_get(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/123', text=json.dumps({
+            'id': 123,
+            'name': 'aaa',
+            'language': 'AAA',
+            'country': 'xxx',
+        }))
+        self.assertEqual(self.client.locales.get(123), Locale(123, 'aaa', 'AAA', 'xxx'))
+        self.assertEqual(self.client.locales.get(123), Locale(123, 'aaa', 'AAA', 'xxx'))
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    @requests_mock.mock()
+    def test_pages(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=0&size=4', text=json.dumps({
+            'content': [
+                {'id': 1, 'name': 'aaa', 'language': 'AAA', 'country': 'xxx'},
+            ],
+            'page': {
+                'size': 1,
+                'totalElements': 1,
+                'totalPages': 1,
+                'number': 0,
+            }
+        }))
+        self.assertEqual(self.client.locales.find(language='AAA'), Locale(1, 'aaa', 'AAA', 'xxx'))
+        self.assertEqual(self.client.locales.find(language='AAA'), Locale(1, 'aaa', 'AAA', 'xxx'))
+        self.assertEqual(len(self.client.locales), 1)
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_uncached_collection(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/123', text=json.dumps({
+            'id': 123,
+            'name': 'aaa',
+            'type': 'AAA',
+        }))
+        self.client.files.get(123)
+        self.client.files.get(123)
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    @requests_mock.mock()
+    def test_endpoints(self, m):
+        for endpoint, name in (('api-demo', 'demo'), ('api', 'live')):
+            m.get('https://{}.lingo24.com/docs/v1/locales/123'.format(endpoint), text=json.dumps({
+                'id': 123,
+                'name': name,
+                'language': 'AAA',
+                'country': 'xxx',
+            }))
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        live_client = Client(authenticator, 'live', response_cache=self.cache)
+        self.assertEqual(self.client.locales.get(123).name, 'demo')
+        self.assertEqual(live_client.locales.get(123).name, 'live')
+        self.assertEqual(self.client.locales.get(123).name, 'demo')
+        self.assertEqual(live_client.locales.get(123).name, 'live')
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(len(self.cache), 2)
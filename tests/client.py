@@ -1,12 +1,19 @@
 import json
+import threading
+import time
+
+import requests
 import requests_mock
 from mock import Mock, patch
 
 from lingo24.business_documents import (
     Authenticator,
     Client,
+    RetryPolicy,
     )
 
+from lingo24.exceptions import DeadlineExceeded
+
 from .base import BaseTestCase
 
 
@@ -33,6 +40,92 @@ class ClientTestCase(BaseTestCase):
         url = client.make_url('abc/def')
         self.assertEqual(url, 'https://api-demo.lingo24.com/docs/v1/abc/def')
 
+    def test_api_session_pool(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', pool_connections=2, pool_maxsize=50, pool_block=True)
+        session = client.api_session
+        self.assertIs(client.api_session, session)
+        adapter = session.get_adapter('https://api-demo.lingo24.com/docs/v1/')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 50)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(session.headers['Connection'], 'keep-alive')
+        self.assertIsNone(authenticator.session)
+
+    @requests_mock.mock()
+    def test_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text='{}')
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', connect_timeout=5, read_timeout=20)
+        self.assertTupleEqual(client.timeout, (5, 20))
+        client.api_get('foo', authenticate=False)
+        client.api_get('foo', authenticate=False, timeout=1)
+        self.assertEqual(m.request_history[0].timeout, (5, 20))
+        self.assertEqual(m.request_history[1].timeout, 1)
+
+    @requests_mock.mock()
+    @patch('time.time', mock_time)
+    def test_deadline(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text='{}')
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', connect_timeout=5, read_timeout=20)
+        with client.deadline(15):
+            client.api_get('foo', authenticate=False)
+        with client.deadline(0):
+            self.assertRaises(DeadlineExceeded, client.api_get, 'foo', authenticate=False)
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(m.request_history[0].timeout, (5, 15))
+
+    @requests_mock.mock()
+    def test_deadline_propagated(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/status', text=json.dumps({'version': 1, 'date': 2}))
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', read_timeout=100)
+        with client.deadline(50):
+            client.warm_up(connections=2)
+        self.assertEqual(m.call_count, 2)
+        for request in m.request_history:
+            self.assertLessEqual(request.timeout[1], 50)
+
+    def test_api_session_no_keep_alive(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', keep_alive=False)
+        self.assertEqual(client.api_session.headers['Connection'], 'close')
+
+    def test_api_session_shared(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', share_session=True)
+        self.assertIs(authenticator.session, client.api_session)
+
+    @requests_mock.mock()
+    def test_api_session_shared_for_first_refresh(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text='{}')
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123
+        }))
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa', 'refresh_token': 'bbb', 'expires_at': 0})
+        client = Client(authenticator, 'demo', share_session=True)
+        # Without the shared session, the refresh would be sent by requests.post.
+        with patch('requests.post') as post:
+            client.api_get('foo')
+        self.assertFalse(post.called)
+        self.assertEqual(m.last_request.headers['Authorization'], 'Bearer ccc')
+
+    @requests_mock.mock()
+    def test_warm_up(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/status', text=json.dumps({
+            'version': '1.2.3',
+            'date': 1234567890,
+        }))
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        client = Client(authenticator, 'demo', pool_maxsize=3)
+        client.warm_up(connections=5)
+        self.assertEqual(m.call_count, 3)
+        self.assertNotIn('Authorization', m.last_request.headers)
+
     @requests_mock.mock()
     def test_status(self, m):
         m.get('https://api-demo.lingo24.com/docs/v1/status', text=json.dumps({
@@ -89,3 +182,201 @@ class ClientTestCase(BaseTestCase):
         authenticator.store.set({'access_token': 'aaa', 'refresh_token': 'bbb', 'expires_at': 50000})
         client = Client(authenticator, 'demo')
         client.api_get('foo')
+
+
+class ClientRetryTestCase(BaseTestCase):
+    def setUp(self):
+        patcher = patch('time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', retry=RetryPolicy(max_retries=2, backoff_factor=0))
+
+    @requests_mock.mock()
+    def test_no_retry_policy(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', status_code=503)
+        self.client.retry = None
+        self.assertRaises(requests.HTTPError, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(self.client.retry_count, 0)
+
+    @requests_mock.mock()
+    def test_retry_success(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', [
+            {'status_code': 429, 'headers': {'Retry-After': '2'}},
+            {'status_code': 503},
+            {'text': '{}'},
+        ])
+        self.assertDictEqual(self.client.api_get_json('foo'), {})
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(self.client.retry_count, 2)
+        self.assertEqual(self.client.retry_delay_total, 2)
+        self.sleep.assert_any_call(2)
+
+    @requests_mock.mock()
+    def test_retry_exhausted(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', status_code=502)
+        self.assertRaises(requests.HTTPError, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(self.client.retry_count, 2)
+
+    @requests_mock.mock()
+    def test_retry_connection_error(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', [
+            {'exc': requests.exceptions.ConnectionError},
+            {'text': '{}'},
+        ])
+        self.client.api_get('foo')
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(self.client.retry_count, 1)
+
+    @requests_mock.mock()
+    def test_retry_connection_error_exhausted(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', exc=requests.exceptions.ConnectionError)
+        self.assertRaises(requests.ConnectionError, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 3)
+
+    @requests_mock.mock()
+    def test_no_retry_non_retryable_status(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', status_code=500)
+        self.assertRaises(requests.HTTPError, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_no_retry_post(self, m):
+        m.post('https://api-demo.lingo24.com/docs/v1/foo', status_code=503)
+        self.assertRaises(requests.HTTPError, self.client.api_post, 'foo')
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_retry_post(self, m):
+        m.post('https://api-demo.lingo24.com/docs/v1/foo', [
+            {'status_code': 503},
+            {'text': '{}'},
+        ])
+        self.client.retry = RetryPolicy(backoff_factor=0, retry_post=True)
+        self.client.api_post('foo')
+        self.assertEqual(m.call_count, 2)
+
+    @requests_mock.mock()
+    def test_no_retry_past_deadline(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', status_code=503, headers={'Retry-After': '10'})
+        with self.client.deadline(5):
+            self.assertRaises(DeadlineExceeded, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(self.client.retry_count, 0)
+
+    @requests_mock.mock()
+    def test_timeout_past_deadline(self, m):
+        now = [10000]
+
+        def timeout(request, context):
+            # The deadline passes while the request is in progress.
+            now[0] += 10
+            raise requests.exceptions.Timeout
+
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=timeout)
+        with patch('time.time', lambda: now[0]):
+            with self.client.deadline(5):
+                self.assertRaises(DeadlineExceeded, self.client.api_get, 'foo')
+        self.assertEqual(m.call_count, 1)
+
+
+class ClientConditionalRequestTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', conditional_requests=True)
+
+    @requests_mock.mock()
+    def test_etag(self, m):
+        def text_callback(request, context):
+            if request.headers.get('If-None-Match') == '"v1"':
+                context.status_code = 304
+                return ''
+            context.headers['ETag'] = '"v1"'
+            return json.dumps({'a': 1})
+
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=text_callback)
+        self.assertDictEqual(self.client.api_get_json('foo'), {'a': 1})
+        self.assertDictEqual(self.client.api_get_json('foo'), {'a': 1})
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(m.last_request.headers['If-None-Match'], '"v1"')
+
+    @requests_mock.mock()
+    def test_not_modified_parsed_once(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', [
+            {'text': json.dumps({'a': 1}), 'headers': {'ETag': '"v1"'}},
+            {'status_code': 304},
+        ])
+        with patch.object(requests.Response, 'json', autospec=True, side_effect=lambda r: json.loads(r.text)) as parse:
+            first = self.client.api_get_json('foo')
+            second = self.client.api_get_json('foo')
+        self.assertDictEqual(second, {'a': 1})
+        self.assertIs(second, first)
+        self.assertEqual(parse.call_count, 1)
+        response = self.client.api_get('foo', headers={'Accept': 'application/json'})
+        self.assertEqual(response.text, json.dumps({'a': 1}))
+
+    @requests_mock.mock()
+    def test_last_modified(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', [
+            {'text': json.dumps({'a': 1}), 'headers': {'Last-Modified': 'Sat, 1 Jan 2000 00:00:00 GMT'}},
+            {'text': json.dumps({'a': 2}), 'headers': {'Last-Modified': 'Sun, 2 Jan 2000 00:00:00 GMT'}},
+            {'status_code': 304},
+        ])
+        self.assertDictEqual(self.client.api_get_json('foo'), {'a': 1})
+        self.assertDictEqual(self.client.api_get_json('foo'), {'a': 2})
+        self.assertEqual(m.last_request.headers['If-Modified-Since'], 'Sat, 1 Jan 2000 00:00:00 GMT')
+        self.assertDictEqual(self.client.api_get_json('foo'), {'a': 2})
+        self.assertEqual(m.last_request.headers['If-Modified-Since'], 'Sun, 2 Jan 2000 00:00:00 GMT')
+
+    @requests_mock.mock()
+    def test_no_validators(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=json.dumps({'a': 1}))
+        self.client.api_get_json('foo')
+        self.client.api_get_json('foo')
+        self.assertNotIn('If-None-Match', m.last_request.headers)
+        self.assertEqual(len(self.client.validator_cache), 0)
+
+    @requests_mock.mock()
+    def test_disabled(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=json.dumps({'a': 1}), headers={'ETag': '"v1"'})
+        self.client.validator_cache = None
+        self.client.api_get_json('foo')
+        self.client.api_get_json('foo')
+        self.assertNotIn('If-None-Match', m.last_request.headers)
+
+
+class ClientCoalescingTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', coalesce_requests=True)
+
+    @requests_mock.mock()
+    def test_concurrent_gets_coalesced(self, m):
+        def text_callback(request, context):
+            time.sleep(0.1)
+            return json.dumps({'a': 1})
+
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=text_callback)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.client.api_get_json('foo')))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(m.call_count, 1)
+        self.assertListEqual(results, [{'a': 1}] * 5)
+
+    @requests_mock.mock()
+    def test_sequential_gets_not_coalesced(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text=json.dumps({'a': 1}))
+        self.client.api_get_json('foo')
+        self.client.api_get_json('foo')
+        self.assertEqual(m.call_count, 2)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+
+from lingo24.business_documents import FileContentCache
+
+from .base import BaseTestCase
+
+
+class FileContentCacheTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = FileContentCache(os.path.join(self.directory, 'cache'), max_bytes=10)
+
+    def set_used(self, file_id, timestamp):
+        os.utime(self.cache.path(file_id), (timestamp, timestamp))
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(1))
+        self.assertIsNone(self.cache.open(1))
+        self.assertIsNone(self.cache.iter_content(1))
+
+    def test_set(self):
+        self.cache.set(1, 'abcde')
+        self.assertEqual(self.cache.get(1), 'abcde')
+        self.assertListEqual(list(self.cache.iter_content(1, chunk_size=2)), ['ab', 'cd', 'e'])
+        self.assertEqual(self.cache.size, 5)
+
+    def test_shared(self):
+        self.cache.set(1, 'abcde')
+        other = FileContentCache(self.cache.directory, max_bytes=10)
+        self.assertEqual(other.get(1), 'abcde')
+
+    def test_writer_failed(self):
+        def write():
+            with self.cache.writer(1) as f:
+                f.write('abc')
+                raise ValueError
+
+        self.assertRaises(ValueError, write)
+        self.assertIsNone(self.cache.get(1))
+        self.assertListEqual(sorted(os.listdir(self.cache.directory)), [])
+
+    def test_eviction(self):
+        self.cache.set(1, 'aaaa')
+        self.set_used(1, 1000)
+        self.cache.set(2, 'bbbb')
+        self.set_used(2, 2000)
+        # Reading an entry makes it the most recently used.
+        self.assertEqual(self.cache.get(1), 'aaaa')
+        self.cache.set(3, 'cccc')
+        self.assertEqual(self.cache.get(1), 'aaaa')
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(3), 'cccc')
+        self.assertEqual(self.cache.size, 8)
+
+    def test_too_large(self):
+        self.cache.set(1, 'a' * 11)
+        self.assertIsNone(self.cache.get(1))
+
+    def test_discard(self):
+        self.cache.set(1, 'abc')
+        self.cache.discard(1)
+        self.assertIsNone(self.cache.get(1))
+        self.cache.discard(1)
+
+    def test_clear(self):
+        self.cache.set(1, 'abc')
+        self.cache.set(2, 'def')
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+        self.assertIsNone(self.cache.get(1))
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+
+from lingo24.business_documents import ContentIndex
+
+from .base import BaseTestCase
+
+
+class ContentIndexTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'content.db')
+
+    def test_get_missing(self):
+        index = ContentIndex(self.path)
+        self.assertIsNone(index.get('https://api.lingo24.com/docs/v1/', 'aaa'))
+
+    def test_set(self):
+        index = ContentIndex(self.path)
+        index.set('https://api.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        self.assertEqual(index.get('https://api.lingo24.com/docs/v1/', 'aaa'), 123)
+        index.set('https://api.lingo24.com/docs/v1/', 'aaa', 456, 10)
+        self.assertEqual(index.get('https://api.lingo24.com/docs/v1/', 'aaa'), 456)
+
+    def test_endpoints_separate(self):
+        index = ContentIndex(self.path)
+        index.set('https://api.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        self.assertIsNone(index.get('https://api-demo.lingo24.com/docs/v1/', 'aaa'))
+
+    def test_discard(self):
+        index = ContentIndex(self.path)
+        index.set('https://api.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        index.discard('https://api.lingo24.com/docs/v1/', 'aaa')
+        self.assertIsNone(index.get('https://api.lingo24.com/docs/v1/', 'aaa'))
+        index.discard('https://api.lingo24.com/docs/v1/', 'aaa')
+
+    def test_discard_file(self):
+        index = ContentIndex(self.path)
+        index.set('https://api.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        index.set('https://api.lingo24.com/docs/v1/', 'bbb', 456, 10)
+        index.set('https://api-demo.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        index.discard_file('https://api.lingo24.com/docs/v1/', 123)
+        self.assertIsNone(index.get('https://api.lingo24.com/docs/v1/', 'aaa'))
+        self.assertEqual(index.get('https://api.lingo24.com/docs/v1/', 'bbb'), 456)
+        self.assertEqual(index.get('https://api-demo.lingo24.com/docs/v1/', 'aaa'), 123)
+
+    def test_persistent(self):
+        ContentIndex(self.path).set('https://api.lingo24.com/docs/v1/', 'aaa', 123, 10)
+        self.assertEqual(ContentIndex(self.path).get('https://api.lingo24.com/docs/v1/', 'aaa'), 123)
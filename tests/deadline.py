@@ -0,0 +1,72 @@
+import threading
+
+from mock import patch
+
+from lingo24.business_documents.deadline import (
+    current_deadline,
+    deadline,
+    limit_timeout,
+    propagate_deadline,
+    remaining,
+    )
+from lingo24.exceptions import APIError, DeadlineExceeded
+
+from .base import BaseTestCase
+
+
+@patch('time.time', lambda: 1000.0)
+class DeadlineTestCase(BaseTestCase):
+    def test_no_deadline(self):
+        self.assertIsNone(current_deadline())
+        self.assertIsNone(remaining())
+        self.assertTupleEqual(limit_timeout((10, 60)), (10, 60))
+        self.assertIsNone(limit_timeout(None))
+
+    def test_deadline(self):
+        with deadline(30):
+            self.assertEqual(current_deadline(), 1030)
+            self.assertEqual(remaining(), 30)
+        self.assertIsNone(current_deadline())
+
+    def test_nested_deadline(self):
+        with deadline(30):
+            with deadline(60):
+                self.assertEqual(current_deadline(), 1030)
+            with deadline(10):
+                self.assertEqual(current_deadline(), 1010)
+            self.assertEqual(current_deadline(), 1030)
+
+    def test_deadline_exceeded(self):
+        with deadline(0):
+            self.assertRaises(DeadlineExceeded, remaining)
+            self.assertRaises(APIError, limit_timeout, 10)
+
+    def test_limit_timeout(self):
+        with deadline(30):
+            self.assertTupleEqual(limit_timeout((10, 60)), (10, 30))
+            self.assertTupleEqual(limit_timeout((None, None)), (30, 30))
+            self.assertEqual(limit_timeout(5), 5)
+            self.assertEqual(limit_timeout(None), 30)
+
+    def test_thread_local(self):
+        seen = []
+        with deadline(30):
+            thread = threading.Thread(target=lambda: seen.append(current_deadline()))
+            thread.start()
+            thread.join()
+        self.assertListEqual(seen, [None])
+
+    def test_propagate_deadline(self):
+        seen = []
+
+        def record():
+            seen.append(current_deadline())
+
+        with deadline(30):
+            wrapped = propagate_deadline(record)
+        self.assertIsNone(current_deadline())
+        thread = threading.Thread(target=wrapped)
+        thread.start()
+        thread.join()
+        self.assertListEqual(seen, [1030])
+        self.assertIs(propagate_deadline(record), record)
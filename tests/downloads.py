@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+
+from lingo24.business_documents import Authenticator, Client
+from lingo24.business_documents.downloads import ResumableDownload
+from lingo24.business_documents.files import File
+from lingo24.exceptions import APIError, DoesNotExist
+
+from .base import BaseTestCase, mock_session
+
+
+CONTENT_URL = 'https://api-demo.lingo24.com/docs/v1/files/1/content'
+
+
+class RangeServer(object):
+    """
+    Serves `content`, honouring Range requests if `ranges` is set. If
+    `truncate` is set, the next response is cut short after that many bytes,
+    as if the connection had dropped.
+    """
+    def __init__(self, content, ranges=True, etag='"v1"', truncate=None):
+        self.content = content
+        self.ranges = ranges
+        self.etag = etag
+        self.truncate = truncate
+
+    def __call__(self, request, context):
+        context.headers['ETag'] = self.etag
+        byte_range = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if self.ranges and byte_range and if_range in (None, self.etag):
+            start, end = re.match(r'^bytes=(\d+)-(\d*)$', byte_range).groups()
+            start = int(start)
+            end = int(end) if end else len(self.content) - 1
+            if start >= len(self.content):
+                context.status_code = 416
+                context.headers['Content-Range'] = 'bytes */{}'.format(len(self.content))
+                return ''
+            end = min(end, len(self.content) - 1)
+            context.status_code = 206
+            context.headers['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, len(self.content))
+            body = self.content[start:end + 1]
+        else:
+            body = self.content
+        context.headers['Content-Length'] = str(len(body))
+        if self.truncate is not None:
+            body = body[:self.truncate]
+            self.truncate = None
+        return body
+
+
+class SteppedBody(object):
+    """
+    A response body which calls `before_read(offset)` before each read, so
+    that a test can hold the stream up or make it fail part of the way
+    through.
+    """
+    def __init__(self, content, before_read):
+        self.content = content
+        self.before_read = before_read
+        self.offset = 0
+        self.closed = False
+
+    def read(self, amount=None, **kwargs):
+        if self.closed:
+            return ''
+        self.before_read(self.offset)
+        end = len(self.content) if amount is None else self.offset + amount
+        chunk = self.content[self.offset:end]
+        self.offset += len(chunk)
+        if not chunk:
+            self.closed = True
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class ResumableDownloadTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo')
+        self.file = File(self.client, 1, 'Test.txt', 'TARGET')
+        self.content = ''.join(chr(i % 256) for i in xrange(1000))
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'Test.txt')
+
+    def read(self, path=None):
+        with open(path or self.path, 'rb') as f:
+            return f.read()
+
+    @mock_session
+    def test_download(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content))
+        digest = self.file.download_resumable(self.path, chunk_size=64, checksum='md5')
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(digest, hashlib.md5(self.content).hexdigest())
+        self.assertListEqual(os.listdir(self.directory), ['Test.txt'])
+        self.assertEqual(m.call_count, 1)
+        self.assertNotIn('Range', m.request_history[0].headers)
+
+    @mock_session
+    def test_resume_after_failure(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content, truncate=300))
+        self.file.download_resumable(self.path, chunk_size=64)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 2)
+        self.assertEqual(m.request_history[1].headers['Range'], 'bytes=300-')
+        self.assertEqual(m.request_history[1].headers['If-Range'], '"v1"')
+
+    @mock_session
+    def test_resume_later(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content, truncate=300))
+        self.assertRaises(APIError, self.file.download_resumable, self.path, chunk_size=64, attempts=1)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.read(self.path + '.part'), self.content[:300])
+        with open(self.path + '.part.json', 'rb') as f:
+            self.assertDictEqual(json.load(f), {
+                'size': 1000,
+                'validator': '"v1"',
+                'ranges': [[0, None, 300]],
+            })
+        self.file.download_resumable(self.path, chunk_size=64)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.request_history[1].headers['Range'], 'bytes=300-')
+        self.assertListEqual(os.listdir(self.directory), ['Test.txt'])
+
+    @mock_session
+    def test_range_not_supported(self, m):
+        server = RangeServer(self.content, truncate=300)
+        m.get(CONTENT_URL, content=server)
+        self.assertRaises(APIError, self.file.download_resumable, self.path, attempts=1)
+        server.ranges = False
+        self.file.download_resumable(self.path)
+        self.assertEqual(self.read(), self.content)
+
+    @mock_session
+    def test_content_changed(self, m):
+        server = RangeServer(self.content, truncate=300)
+        m.get(CONTENT_URL, content=server)
+        self.assertRaises(APIError, self.file.download_resumable, self.path, attempts=1)
+        server.content = 'xyz' * 500
+        server.etag = '"v2"'
+        self.file.download_resumable(self.path)
+        self.assertEqual(self.read(), 'xyz' * 500)
+
+    @mock_session
+    def test_already_complete(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content))
+        with open(self.path + '.part', 'wb') as f:
+            f.write(self.content)
+        with open(self.path + '.part.json', 'wb') as f:
+            json.dump({'size': 1000, 'validator': '"v1"', 'ranges': [[0, None, 1000]]}, f)
+        self.file.download_resumable(self.path)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 0)
+
+    @mock_session
+    def test_parallel(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content))
+        self.file.download_resumable(self.path, chunk_size=64, parts=4)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 5)
+        self.assertItemsEqual([request.headers['Range'] for request in m.request_history], [
+            'bytes=0-0',
+            'bytes=0-249',
+            'bytes=250-499',
+            'bytes=500-749',
+            'bytes=750-999',
+        ])
+        self.assertListEqual(os.listdir(self.directory), ['Test.txt'])
+
+    @mock_session
+    def test_parallel_resume(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content))
+        with open(self.path + '.part', 'wb') as f:
+            f.write(self.content[:100] + '\0' * 400 + self.content[500:])
+        with open(self.path + '.part.json', 'wb') as f:
+            json.dump({'size': 1000, 'validator': '"v1"', 'ranges': [[0, 499, 100], [500, 999, 500]]}, f)
+        self.file.download_resumable(self.path, parts=2)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(m.request_history[0].headers['Range'], 'bytes=100-499')
+
+    @mock_session
+    def test_parallel_part_fails(self, m):
+        server = RangeServer(self.content)
+        others_streaming = threading.Semaphore(0)
+        failed = threading.Event()
+        attempts = []
+
+        def first_part(offset):
+            if offset == 64 and not attempts:
+                attempts.append(offset)
+                for _ in xrange(3):
+                    others_streaming.acquire()
+                failed.set()
+                raise socket.error('Connection reset')
+
+        retried = threading.Event()
+
+        def other_part(offset):
+            if offset == 64:
+                others_streaming.release()
+                failed.wait(5)
+                # Carry on streaming once the failed part has been retried, or
+                # (as the retry should wait for this part) after a short while.
+                retried.wait(0.3)
+
+        def body(request, context):
+            content = server(request, context)
+            if request.headers['Range'] == 'bytes=0-0':
+                return SteppedBody(content, lambda offset: None)
+            if request.headers['Range'].startswith('bytes=0-'):
+                return SteppedBody(content, first_part)
+            if request.headers['Range'].startswith('bytes=64-'):
+                retried.set()
+                return SteppedBody(content, lambda offset: None)
+            return SteppedBody(content, other_part)
+
+        m.get(CONTENT_URL, body=body)
+        self.file.download_resumable(self.path, chunk_size=64, parts=4)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 6)
+        self.assertEqual(m.request_history[-1].headers['Range'], 'bytes=64-249')
+        self.assertListEqual(os.listdir(self.directory), ['Test.txt'])
+
+    @mock_session
+    def test_parallel_range_not_supported(self, m):
+        m.get(CONTENT_URL, content=RangeServer(self.content, ranges=False))
+        self.file.download_resumable(self.path, parts=4)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(m.call_count, 1)
+
+    @mock_session
+    def test_parallel_empty(self, m):
+        m.get(CONTENT_URL, content=RangeServer(''))
+        digest = self.file.download_resumable(self.path, parts=4, checksum='md5')
+        self.assertEqual(self.read(), '')
+        self.assertEqual(digest, hashlib.md5('').hexdigest())
+        self.assertEqual(m.call_count, 1)
+        self.assertListEqual(os.listdir(self.directory), ['Test.txt'])
+
+    @mock_session
+    def test_missing(self, m):
+        m.get(CONTENT_URL, status_code=404)
+        self.assertRaises(DoesNotExist, self.file.download_resumable, self.path)
+        self.assertEqual(m.call_count, 1)
+
+    def test_paths(self):
+        download = ResumableDownload(self.file, self.path)
+        self.assertEqual(download.part_path, self.path + '.part')
+        self.assertEqual(download.state_path, self.path + '.part.json')
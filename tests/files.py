@@ -1,16 +1,51 @@
+import hashlib
+import itertools
 import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from StringIO import StringIO
 
+import requests
 import requests_mock
+from mock import patch
 
-from lingo24.business_documents import Authenticator, Client
+from lingo24.business_documents import (
+    Authenticator,
+    Client,
+    ContentIndex,
+    FileContentCache,
+    RetryPolicy,
+    )
 from lingo24.business_documents.files import (
     BaseFileCollection,
     FileCollection,
     File,
+    content_checksum,
 )
 from lingo24.exceptions import APIError, DoesNotExist
 
-from .base import BaseTestCase
+from .base import BaseTestCase, mock_session
+
+
+class UnseekableStream(object):
+    """
+    A stream which reports its position but can't seek, like a response's
+    `raw` stream.
+    """
+    def __init__(self, data):
+        self.source = StringIO(data)
+
+    def read(self, size=-1):
+        return self.source.read(size)
+
+    def tell(self):
+        return self.source.tell()
+
+    def seek(self, offset, whence=0):
+        raise IOError('seek')
 
 
 class FileTestCase(BaseTestCase):
@@ -44,6 +79,78 @@ class FileTestCase(BaseTestCase):
         file_obj = File(self.client, 1, 'Test.txt', 'AAA')
         self.assertRaises(APIError, lambda: file_obj.content)
 
+    @requests_mock.mock()
+    def test_get_content_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', exc=requests.exceptions.ReadTimeout)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertRaises(APIError, lambda: file_obj.content)
+
+    @requests_mock.mock()
+    def test_iter_content(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertListEqual(list(file_obj.iter_content(chunk_size=4)), ['abcd', 'efgh', 'ij'])
+        self.assertTrue(m.request_history[0].stream)
+
+    @requests_mock.mock()
+    def test_iter_content_missing(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', status_code=404)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertRaises(DoesNotExist, file_obj.iter_content)
+
+    @requests_mock.mock()
+    def test_iter_content_error(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', status_code=500)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertRaises(APIError, file_obj.iter_content)
+
+    @requests_mock.mock()
+    def test_download_to_file_object(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        f = StringIO()
+        self.assertIsNone(file_obj.download_to(f, chunk_size=4))
+        self.assertEqual(f.getvalue(), 'abcdefghij')
+
+    @requests_mock.mock()
+    def test_download_to_path(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Test.txt')
+        digest = file_obj.download_to(path, chunk_size=4, checksum='sha256')
+        self.assertEqual(digest, hashlib.sha256('abcdefghij').hexdigest())
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), 'abcdefghij')
+        self.assertListEqual(os.listdir(directory), ['Test.txt'])
+
+    @requests_mock.mock()
+    def test_download_to_path_missing(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', status_code=404)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.assertRaises(DoesNotExist, file_obj.download_to, os.path.join(directory, 'Test.txt'))
+        self.assertListEqual(os.listdir(directory), [])
+
+    def test_download_to_path_interrupted(self):
+        def iter_content(chunk_size):
+            yield 'abcd'
+            raise APIError('Connection broken')
+
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Test.txt')
+        with open(path, 'wb') as f:
+            f.write('old')
+        with patch.object(file_obj, 'iter_content', iter_content):
+            self.assertRaises(APIError, file_obj.download_to, path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertListEqual(os.listdir(directory), ['Test.txt'])
+
     @requests_mock.mock()
     def test_set_content(self, m):
         def text_callback(request, context):
@@ -63,6 +170,129 @@ class FileTestCase(BaseTestCase):
 
         self.assertRaises(APIError, set_content)
 
+    def mock_upload(self, m):
+        received = {}
+
+        def text_callback(request, context):
+            # The body is streamed, so read it as the connection would.
+            body = request.body
+            if 'Content-Length' in request.headers:
+                received['data'] = ''.join(iter(lambda: body.read(3), ''))
+            else:
+                received['data'] = ''.join(body)
+            received['headers'] = request.headers
+            return ''
+
+        m.put('https://api-demo.lingo24.com/docs/v1/files/1/content', text=text_callback)
+        return received
+
+    @requests_mock.mock()
+    def test_upload_from_path(self, m):
+        received = self.mock_upload(m)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Test.txt')
+        with open(path, 'wb') as f:
+            f.write('abcdefghij')
+        progress = []
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        sent = file_obj.upload_from(path, progress=lambda *args: progress.append(args))
+        self.assertEqual(sent, 10)
+        self.assertEqual(received['data'], 'abcdefghij')
+        self.assertEqual(received['headers']['Content-Length'], '10')
+        self.assertListEqual(progress, [(3, 10), (6, 10), (9, 10), (10, 10)])
+
+    @requests_mock.mock()
+    def test_upload_from_empty_path(self, m):
+        received = self.mock_upload(m)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Test.txt')
+        open(path, 'wb').close()
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertEqual(file_obj.upload_from(path), 0)
+        self.assertEqual(received['data'], '')
+
+    @requests_mock.mock()
+    def test_upload_from_file_object(self, m):
+        received = self.mock_upload(m)
+        source = StringIO('abcdefghij')
+        source.seek(2)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertEqual(file_obj.upload_from(source), 8)
+        self.assertEqual(received['data'], 'cdefghij')
+        self.assertEqual(received['headers']['Content-Length'], '8')
+
+    @requests_mock.mock()
+    def test_upload_from_iterable(self, m):
+        received = self.mock_upload(m)
+        progress = []
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        sent = file_obj.upload_from(iter(['abcd', 'efgh', 'ij']), progress=lambda *args: progress.append(args))
+        self.assertEqual(sent, 10)
+        self.assertEqual(received['data'], 'abcdefghij')
+        self.assertEqual(received['headers']['Transfer-Encoding'], 'chunked')
+        self.assertListEqual(progress, [(4, None), (8, None), (10, None)])
+
+    def mock_expired_upload(self, m):
+        self.client.authenticator.store.set({'access_token': 'aaa', 'refresh_token': 'bbb'})
+        m.post('https://api.lingo24.com/docs/v1/oauth2/access?refresh_token=bbb', text=json.dumps({
+            'access_token': 'ccc',
+            'refresh_token': 'ddd',
+            'expires_in': 123
+        }))
+        bodies = []
+
+        def text_callback(request, context):
+            body = request.body
+            if 'Content-Length' in request.headers:
+                bodies.append(''.join(iter(lambda: body.read(3), '')))
+            else:
+                bodies.append(''.join(body))
+            if request.headers['Authorization'] != 'Bearer ccc':
+                context.status_code = 401
+            return ''
+
+        m.put('https://api-demo.lingo24.com/docs/v1/files/1/content', text=text_callback)
+        return bodies
+
+    @requests_mock.mock()
+    def test_upload_from_path_expired_token(self, m):
+        bodies = self.mock_expired_upload(m)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'Test.txt')
+        with open(path, 'wb') as f:
+            f.write('abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertEqual(file_obj.upload_from(path), 10)
+        self.assertListEqual(bodies, ['abcdefghij', 'abcdefghij'])
+
+    @requests_mock.mock()
+    def test_upload_from_file_object_expired_token(self, m):
+        bodies = self.mock_expired_upload(m)
+        source = StringIO('abcdefghij')
+        source.seek(2)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertEqual(file_obj.upload_from(source), 8)
+        self.assertListEqual(bodies, ['cdefghij', 'cdefghij'])
+
+    @requests_mock.mock()
+    def test_upload_from_iterable_expired_token(self, m):
+        bodies = self.mock_expired_upload(m)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertRaises(APIError, file_obj.upload_from, iter(['abcd', 'efgh', 'ij']))
+        self.assertListEqual(bodies, ['abcdefghij'])
+        self.assertEqual(self.client.authenticator.access_token, 'ccc')
+
+    @requests_mock.mock()
+    def test_upload_from_not_retried(self, m):
+        m.put('https://api-demo.lingo24.com/docs/v1/files/1/content', status_code=503)
+        self.client.retry = RetryPolicy(backoff_factor=0)
+        file_obj = File(self.client, 1, 'Test.txt', 'AAA')
+        self.assertRaises(APIError, file_obj.upload_from, StringIO('abc'))
+        self.assertEqual(m.call_count, 1)
+
     @requests_mock.mock()
     def test_delete(self, m):
         m.delete('https://api-demo.lingo24.com/docs/v1/files/1')
@@ -118,6 +348,47 @@ class FileCollectionBasicTestCase(BaseTestCase):
         m.get('https://api-demo.lingo24.com/docs/v1/files/123', status_code=500)
         self.assertRaises(APIError, self.client.files.get, 123)
 
+    @mock_session
+    def test_get_many(self, m):
+        for file_id in (1, 2, 3):
+            m.get('https://api-demo.lingo24.com/docs/v1/files/{}'.format(file_id), text=json.dumps({
+                'id': file_id,
+                'name': 'aaa',
+                'type': 'AAA',
+            }))
+        m.get('https://api-demo.lingo24.com/docs/v1/files/4', status_code=404)
+        m.get('https://api-demo.lingo24.com/docs/v1/files/5', status_code=500)
+        m.get('https://api-demo.lingo24.com/docs/v1/files/6', exc=requests.exceptions.ConnectionError)
+        items, errors = self.client.files.get_many([1, 2, 3, 2, 1, 4, 5, 6], workers=3)
+        self.assertEqual(m.call_count, 6)
+        self.assertDictEqual(items, {
+            1: File(self.client, 1, 'aaa', 'AAA'),
+            2: File(self.client, 2, 'aaa', 'AAA'),
+            3: File(self.client, 3, 'aaa', 'AAA'),
+        })
+        self.assertItemsEqual(errors.keys(), [4, 5, 6])
+        self.assertIsInstance(errors[4], DoesNotExist)
+        self.assertIsInstance(errors[5], APIError)
+        self.assertIsInstance(errors[6], APIError)
+
+    @mock_session
+    def test_get_many_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1', text=json.dumps({
+            'id': 1,
+            'name': 'aaa',
+            'type': 'AAA',
+        }))
+        m.get('https://api-demo.lingo24.com/docs/v1/files/2', exc=requests.exceptions.ReadTimeout)
+        items, errors = self.client.files.get_many([1, 2])
+        self.assertListEqual(items.keys(), [1])
+        self.assertListEqual(errors.keys(), [2])
+        self.assertIsInstance(errors[2], APIError)
+
+    @mock_session
+    def test_get_many_empty(self, m):
+        self.assertTupleEqual(self.client.files.get_many([]), ({}, {}))
+        self.assertEqual(m.call_count, 0)
+
     @requests_mock.mock()
     def test_create(self, m):
         def text_callback(request, context):
@@ -141,3 +412,321 @@ class FileCollectionBasicTestCase(BaseTestCase):
     def test_create_error(self, m):
         m.post('https://api-demo.lingo24.com/docs/v1/files', status_code=400)
         self.assertRaises(APIError, self.client.files.create, 'Test.txt')
+
+
+class FileCollectionBulkUploadTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', per_page=4)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.uploaded = {}
+        self.lock = threading.Lock()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def setup_data(self, m):
+        ids = itertools.count(1)
+
+        def create_callback(request, context):
+            with self.lock:
+                file_id = next(ids)
+            return json.dumps({
+                'id': file_id,
+                'name': request.json()['name'],
+                'type': 'SOURCE',
+            })
+
+        def content_callback(request, context):
+            file_id = int(request.url.split('/')[-2])
+            body = request.body
+            data = ''.join(iter(lambda: body.read(1024), '')) if hasattr(body, 'read') else ''.join(body)
+            if data == 'error':
+                context.status_code = 500
+            with self.lock:
+                self.uploaded[file_id] = data
+            return ''
+
+        m.post('https://api-demo.lingo24.com/docs/v1/files', text=create_callback)
+        m.put(re.compile(r'https://api-demo\.lingo24\.com/docs/v1/files/\d+/content'), text=content_callback)
+
+    @mock_session
+    def test_bulk_upload(self, m):
+        self.setup_data(m)
+        items = [self.write('File{}.txt'.format(i), 'content {}'.format(i)) for i in xrange(10)]
+        items.append(('Other.txt', StringIO('other content')))
+        result = self.client.files.bulk_upload(iter(items), workers=3)
+        self.assertEqual(len(result.results), 11)
+        self.assertListEqual(result.errors, [])
+        self.assertListEqual([f.name for f in result.files], ['File{}.txt'.format(i) for i in xrange(10)] + ['Other.txt'])
+        self.assertItemsEqual(self.uploaded.values(), ['content {}'.format(i) for i in xrange(10)] + ['other content'])
+        for f in result.files:
+            self.assertEqual(self.uploaded[f.id], 'other content' if f.name == 'Other.txt' else 'content {}'.format(f.name[4]))
+        self.assertEqual(result.bytes_sent, 10 * 9 + 13)
+        self.assertGreater(result.elapsed, 0)
+        self.assertGreater(result.bytes_per_second, 0)
+
+    @mock_session
+    def test_bulk_upload_errors(self, m):
+        self.setup_data(m)
+        missing = os.path.join(self.directory, 'Missing.txt')
+        items = [self.write('Good.txt', 'good'), missing, ('Bad.txt', StringIO('error'))]
+        result = self.client.files.bulk_upload(items, workers=2)
+        self.assertListEqual([f.name for f in result.files], ['Good.txt'])
+        self.assertListEqual([item for item, _ in result.errors], [missing, items[2]])
+        missing_result, bad_result = result.results[1:]
+        self.assertFalse(missing_result.ok)
+        self.assertIsInstance(missing_result.error, IOError)
+        self.assertFalse(bad_result.ok)
+        self.assertIsInstance(bad_result.error, APIError)
+        # The file was created before its content failed to upload.
+        self.assertEqual(bad_result.file.name, 'Bad.txt')
+
+    @mock_session
+    def test_bulk_upload_project(self, m):
+        self.setup_data(m)
+        m.post('https://api-demo.lingo24.com/docs/v1/projects/7/files', text='')
+        project = self.client.projects.make_item(
+            id=7,
+            name='aaa',
+            domainId=1,
+            projectStatus='CREATED',
+            created=123,
+            projectCallbackUrl=None,
+        )
+        result = self.client.files.bulk_upload([self.write('Test.txt', 'test')], project=project)
+        self.assertEqual(len(result.files), 1)
+        added = [r for r in m.request_history if r.url.endswith('/projects/7/files')]
+        self.assertEqual(len(added), 1)
+        self.assertDictEqual(added[0].json(), {'id': result.files[0].id})
+
+    def test_bulk_upload_empty(self):
+        result = self.client.files.bulk_upload([])
+        self.assertListEqual(result.results, [])
+        self.assertEqual(result.bytes_sent, 0)
+
+
+class FileCollectionContentIndexTestCase(FileCollectionBulkUploadTestCase):
+    def setUp(self):
+        super(FileCollectionContentIndexTestCase, self).setUp()
+        self.client.content_index = ContentIndex(os.path.join(self.directory, 'content.db'))
+
+    def setup_data(self, m):
+        super(FileCollectionContentIndexTestCase, self).setup_data(m)
+
+        def get_callback(request, context):
+            file_id = int(request.url.split('/')[-1])
+            if file_id not in self.uploaded:
+                context.status_code = 404
+                return ''
+            return json.dumps({
+                'id': file_id,
+                'name': 'Existing.txt',
+                'type': 'SOURCE',
+            })
+
+        m.get(re.compile(r'https://api-demo\.lingo24\.com/docs/v1/files/\d+$'), text=get_callback)
+
+    def uploads(self, m):
+        return [r for r in m.request_history if r.method == 'PUT']
+
+    def test_content_checksum(self):
+        path = self.write('Test.txt', 'abc')
+        expected = (hashlib.sha256('abc').hexdigest(), 3)
+        self.assertTupleEqual(content_checksum(path, chunk_size=2), expected)
+        source = StringIO('xabc')
+        source.seek(1)
+        self.assertTupleEqual(content_checksum(source), expected)
+        self.assertEqual(source.tell(), 1)
+        self.assertIsNone(content_checksum(iter(['abc'])))
+        source = UnseekableStream('abc')
+        self.assertIsNone(content_checksum(source))
+        self.assertEqual(source.read(), 'abc')
+
+    @mock_session
+    def test_create_with_content(self, m):
+        self.setup_data(m)
+        file_obj = self.client.files.create_with_content('Test.txt', self.write('Test.txt', 'abc'))
+        self.assertEqual(file_obj.name, 'Test.txt')
+        self.assertEqual(self.uploaded[file_obj.id], 'abc')
+        self.assertEqual(len(self.uploads(m)), 1)
+
+    @mock_session
+    def test_create_with_content_reused(self, m):
+        self.setup_data(m)
+        first = self.client.files.create_with_content('First.txt', self.write('First.txt', 'abc'))
+        second = self.client.files.create_with_content('Second.txt', StringIO('abc'))
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(len(self.uploads(m)), 1)
+        third = self.client.files.create_with_content('Third.txt', StringIO('abcd'))
+        self.assertNotEqual(third.id, first.id)
+        self.assertEqual(len(self.uploads(m)), 2)
+
+    @mock_session
+    def test_create_with_content_reused_file_deleted(self, m):
+        self.setup_data(m)
+        first = self.client.files.create_with_content('First.txt', StringIO('abc'))
+        del self.uploaded[first.id]
+        second = self.client.files.create_with_content('Second.txt', StringIO('abc'))
+        self.assertNotEqual(second.id, first.id)
+        self.assertEqual(len(self.uploads(m)), 2)
+        third = self.client.files.create_with_content('Third.txt', StringIO('abc'))
+        self.assertEqual(third.id, second.id)
+
+    @mock_session
+    def test_create_with_content_overwritten(self, m):
+        self.setup_data(m)
+        path = self.write('Test.txt', 'abc')
+        first = self.client.files.create_with_content('First.txt', path)
+        first.content = 'something else'
+        second = self.client.files.create_with_content('Second.txt', path)
+        self.assertNotEqual(second.id, first.id)
+        self.assertEqual(self.uploaded[second.id], 'abc')
+        third = self.client.files.create_with_content('Third.txt', StringIO('something else'))
+        self.assertEqual(third.id, first.id)
+        second.upload_from(StringIO('more'))
+        fourth = self.client.files.create_with_content('Fourth.txt', path)
+        self.assertNotIn(fourth.id, (first.id, second.id))
+
+    @mock_session
+    def test_create_with_content_deleted(self, m):
+        self.setup_data(m)
+        m.delete(re.compile(r'https://api-demo\.lingo24\.com/docs/v1/files/\d+$'), text='')
+        first = self.client.files.create_with_content('First.txt', StringIO('abc'))
+        first.delete()
+        self.assertIsNone(self.client.content_index.get(self.client.api_endpoint_url, hashlib.sha256('abc').hexdigest()))
+
+    @mock_session
+    def test_create_with_content_not_seekable(self, m):
+        self.setup_data(m)
+        self.client.files.create_with_content('First.txt', iter(['abc']))
+        self.client.files.create_with_content('Second.txt', iter(['abc']))
+        self.assertEqual(len(self.uploads(m)), 2)
+
+    @mock_session
+    def test_create_with_content_not_seekable_stream(self, m):
+        self.setup_data(m)
+        file_obj = self.client.files.create_with_content('Test.txt', UnseekableStream('hello world'))
+        self.assertEqual(self.uploaded[file_obj.id], 'hello world')
+        self.assertEqual(len(self.uploads(m)), 1)
+
+    @mock_session
+    def test_create_with_content_project(self, m):
+        self.setup_data(m)
+        m.post('https://api-demo.lingo24.com/docs/v1/projects/7/files', text='')
+        project = self.client.projects.make_item(
+            id=7,
+            name='aaa',
+            domainId=1,
+            projectStatus='CREATED',
+            created=123,
+            projectCallbackUrl=None,
+        )
+        first = self.client.files.create_with_content('First.txt', StringIO('abc'), project=project)
+        self.client.files.create_with_content('Second.txt', StringIO('abc'), project=project)
+        added = [r.json() for r in m.request_history if r.url.endswith('/projects/7/files')]
+        self.assertListEqual(added, [{'id': first.id}, {'id': first.id}])
+
+    @mock_session
+    def test_bulk_upload_reused(self, m):
+        self.setup_data(m)
+        self.client.files.create_with_content('Existing.txt', StringIO('same'))
+        items = [
+            self.write('One.txt', 'same'),
+            self.write('Two.txt', 'different'),
+        ]
+        result = self.client.files.bulk_upload(items, workers=2)
+        self.assertListEqual(result.errors, [])
+        self.assertEqual(len(result.reused), 1)
+        self.assertTrue(result.results[0].reused)
+        self.assertEqual(result.results[0].bytes_sent, 0)
+        self.assertFalse(result.results[1].reused)
+        self.assertEqual(result.bytes_sent, 9)
+        self.assertEqual(len(self.uploads(m)), 2)
+
+
+class FileContentCachingTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', content_cache=FileContentCache(self.directory))
+        self.file = File(self.client, 1, 'Test.txt', 'TARGET')
+        self.file.content_final = True
+
+    @requests_mock.mock()
+    def test_content(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        self.assertEqual(self.file.content, 'abcdefghij')
+        self.assertEqual(self.file.content, 'abcdefghij')
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_content_missing(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', status_code=404)
+        self.assertIsNone(self.file.content)
+        self.assertIsNone(self.file.content)
+        self.assertEqual(m.call_count, 2)
+
+    @requests_mock.mock()
+    def test_source_not_cached(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'SOURCE')
+        self.assertIsNone(file_obj.content_cache)
+        file_obj.content
+        file_obj.content
+        self.assertEqual(m.call_count, 2)
+
+    @requests_mock.mock()
+    def test_target_not_final_not_cached(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        file_obj = File(self.client, 1, 'Test.txt', 'TARGET')
+        self.assertIsNone(file_obj.content_cache)
+        file_obj.content
+        file_obj.content
+        self.assertEqual(m.call_count, 2)
+        self.assertIsNone(self.client.content_cache.get(1))
+
+    @requests_mock.mock()
+    def test_iter_content(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        self.assertListEqual(list(self.file.iter_content(chunk_size=4)), ['abcd', 'efgh', 'ij'])
+        self.assertListEqual(list(self.file.iter_content(chunk_size=4)), ['abcd', 'efgh', 'ij'])
+        self.assertEqual(self.file.content, 'abcdefghij')
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_iter_content_partial(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        chunks = self.file.iter_content(chunk_size=4)
+        self.assertEqual(next(chunks), 'abcd')
+        chunks.close()
+        self.assertIsNone(self.client.content_cache.get(1))
+        self.assertListEqual(os.listdir(self.directory), [])
+
+    @requests_mock.mock()
+    def test_download_to(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        self.file.content
+        f = StringIO()
+        self.file.download_to(f)
+        self.assertEqual(f.getvalue(), 'abcdefghij')
+        self.assertEqual(m.call_count, 1)
+
+    @requests_mock.mock()
+    def test_set_content_discards(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/files/1/content', text='abcdefghij')
+        m.put('https://api-demo.lingo24.com/docs/v1/files/1/content', text='')
+        m.delete('https://api-demo.lingo24.com/docs/v1/files/1', text='')
+        self.file.content
+        self.file.content = 'xxx'
+        self.assertIsNone(self.client.content_cache.get(1))
+        self.file.content
+        self.file.delete()
+        self.assertIsNone(self.client.content_cache.get(1))
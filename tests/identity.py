@@ -0,0 +1,89 @@
+import datetime
+import gc
+import json
+
+import requests_mock
+
+from lingo24.business_documents import Authenticator, Client, IdentityMap
+from lingo24.business_documents.locales import Locale
+from lingo24.business_documents.projects import Project
+
+from .base import BaseTestCase
+
+
+class IdentityMapTestCase(BaseTestCase):
+    def test_merge(self):
+        identity_map = IdentityMap()
+        first = Locale(1, 'aaa', 'AAA', 'xxx')
+        second = Locale(1, 'bbb', 'BBB', 'yyy')
+        self.assertIs(identity_map.merge(first), first)
+        self.assertIs(identity_map.merge(second), first)
+        self.assertEqual(first, second)
+        self.assertIsNot(identity_map.merge(Locale(2, 'aaa', 'AAA', 'xxx')), first)
+
+    def test_merge_without_id(self):
+        identity_map = IdentityMap()
+        item = object()
+        self.assertIs(identity_map.merge(item), item)
+        self.assertEqual(len(identity_map), 0)
+
+    def test_weak_references(self):
+        identity_map = IdentityMap(max_size=1)
+        identity_map.merge(Locale(1, 'aaa', 'AAA', 'xxx'))
+        identity_map.merge(Locale(2, 'bbb', 'BBB', 'xxx'))
+        gc.collect()
+        self.assertEqual(len(identity_map), 1)
+        held = Locale(3, 'ccc', 'CCC', 'xxx')
+        identity_map.merge(held)
+        identity_map.merge(Locale(4, 'ddd', 'DDD', 'xxx'))
+        gc.collect()
+        self.assertEqual(len(identity_map), 2)
+        self.assertIs(identity_map.merge(Locale(3, 'xxx', 'XXX', 'xxx')), held)
+
+
+class ClientIdentityMapTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', per_page=4, identity_map=IdentityMap())
+
+    def test_make_item(self):
+        first = self.client.locales.make_item(id=1, name='aaa', language='AAA', country='xxx')
+        second = self.client.locales.make_item(id=1, name='bbb', language='AAA', country='xxx')
+        self.assertIs(first, second)
+        self.assertEqual(first.name, 'bbb')
+
+    @requests_mock.mock()
+    def test_get(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/123', text=json.dumps({
+            'id': 123,
+            'name': 'aaa',
+            'language': 'AAA',
+            'country': 'xxx',
+        }))
+        self.assertIs(self.client.locales.get(123), self.client.locales.get(123))
+
+    @requests_mock.mock()
+    def test_refresh(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1', text=json.dumps({
+            'id': 1,
+            'name': 'xxx',
+            'domainId': 3,
+            'projectStatus': 'yyy',
+            'created': 456,
+            'projectCallbackUrl': 'zzz',
+        }))
+        project = self.client.projects.make_item(
+            id=1,
+            name='aaa',
+            domainId=123,
+            projectStatus='bbb',
+            created=123,
+            projectCallbackUrl='ccc',
+        )
+        jobs = project.jobs
+        project.refresh()
+        self.assertIs(self.client.projects.get(1), project)
+        self.assertEqual(project, Project(self.client, 1, 'xxx', 3, 'yyy', datetime.datetime.utcfromtimestamp(456), 'zzz'))
+        self.assertIs(project.jobs, jobs)
+        self.assertIs(project.jobs.project, project)
@@ -2,6 +2,7 @@ import datetime
 import json
 from decimal import Decimal
 
+import requests
 import requests_mock
 
 from lingo24.business_documents import Authenticator, Client
@@ -106,6 +107,9 @@ class JobTestCase(BaseTestCase):
         }))
         job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, 6)
         self.assertEqual(job.target_file, File(self.client, 6, 'Target.txt', 'TARGET'))
+        self.assertFalse(job.target_file.content_final)
+        job = Job(self.project.jobs, 123, 'TRANSLATED', 2, 3, 4, 5, 6)
+        self.assertTrue(job.target_file.content_final)
 
     def test_target_file_empty(self):
         job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, None)
@@ -150,6 +154,12 @@ class JobTestCase(BaseTestCase):
         job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, 6)
         self.assertRaises(APIError, lambda: job.price)
 
+    @requests_mock.mock()
+    def test_price_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs/123/price', exc=requests.exceptions.ReadTimeout)
+        job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, 6)
+        self.assertRaises(APIError, lambda: job.price)
+
     @requests_mock.mock()
     def test_metrics(self, m):
         m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs/123/metrics', text=json.dumps({
@@ -178,6 +188,12 @@ class JobTestCase(BaseTestCase):
         job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, 6)
         self.assertRaises(APIError, lambda: job.metrics)
 
+    @requests_mock.mock()
+    def test_metrics_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs/123/metrics', exc=requests.exceptions.ReadTimeout)
+        job = Job(self.project.jobs, 123, 'aaa', 2, 3, 4, 5, 6)
+        self.assertRaises(APIError, lambda: job.metrics)
+
     @requests_mock.mock()
     def test_delete(self, m):
         m.delete('https://api-demo.lingo24.com/docs/v1/projects/1/jobs/123')
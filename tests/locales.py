@@ -1,12 +1,14 @@
 import json
+import threading
 
+import requests
 import requests_mock
 
 from lingo24.business_documents import Authenticator, Client
 from lingo24.business_documents.locales import Locale, LocaleCollection
-from lingo24.exceptions import APIError, DoesNotExist
+from lingo24.exceptions import APIError, DoesNotExist, PaginationDrift
 
-from .base import BaseTestCase
+from .base import BaseTestCase, mock_session
 
 
 class LocaleTestCase(BaseTestCase):
@@ -40,6 +42,15 @@ class LocaleCollectionBasicTestCase(BaseTestCase):
     def test_item_url_path(self):
         self.assertEqual(self.client.locales.item_url_path(123), 'locales/123')
 
+    def test_prefetch(self):
+        locales = self.client.locales
+        prefetching = locales.prefetch(depth=2)
+        self.assertEqual(locales.prefetch_depth, 0)
+        self.assertEqual(prefetching.prefetch_depth, 2)
+        self.assertEqual(prefetching.clone().prefetch_depth, 2)
+        self.assertEqual(prefetching.sort('name').prefetch_depth, 2)
+        self.assertRaises(ValueError, locales.prefetch, -1)
+
     def test_sort(self):
         locales = self.client.locales
         locales_by_name = locales.sort('name')
@@ -113,6 +124,18 @@ class LocaleCollectionEmptyTestCase(BaseTestCase):
         it = iter(self.client.locales)
         self.assertRaises(APIError, it.next)
 
+    @requests_mock.mock()
+    def test_iteration_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=0&size=4', exc=requests.exceptions.ReadTimeout)
+        it = iter(self.client.locales)
+        self.assertRaises(APIError, it.next)
+
+    @mock_session
+    def test_parallel_iteration(self, m):
+        self.setup_data(m)
+        it = self.client.locales.parallel_iter(workers=2)
+        self.assertRaises(StopIteration, it.next)
+
     @requests_mock.mock()
     def test_indexing(self, m):
         self.setup_data(m)
@@ -227,6 +250,101 @@ class LocaleCollectionDataTestCase(BaseTestCase):
         self.assertEqual(it.next(), Locale(10, 'jjj', 'JJJ', 'xxx'))
         self.assertRaises(StopIteration, it.next)
 
+    @mock_session
+    def test_prefetch_iteration(self, m):
+        self.setup_data(m)
+        locales = list(self.client.locales.prefetch(depth=1))
+        self.assertListEqual([locale.id for locale in locales], range(1, 11))
+        self.assertEqual(locales[4], Locale(5, 'eee', 'EEE', 'xxx'))
+
+    @mock_session
+    def test_prefetch_concurrent(self, m):
+        self.setup_data(m)
+        pages = {}
+        for page_index in (1, 2):
+            url = 'https://api-demo.lingo24.com/docs/v1/locales/?page={}&size=4'.format(page_index)
+            pages[page_index] = self.client.api_session.get(url).text
+        started = {1: threading.Event(), 2: threading.Event()}
+        overlapped = []
+
+        def text_callback(request, context):
+            page_index = int(request.qs['page'][0])
+            started[page_index].set()
+            # Each page waits to see whether the other is requested meanwhile.
+            overlapped.append(started[3 - page_index].wait(1))
+            return pages[page_index]
+
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=1&size=4', text=text_callback)
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=2&size=4', text=text_callback)
+        locales = list(self.client.locales.prefetch(depth=2))
+        self.assertListEqual([locale.id for locale in locales], range(1, 11))
+        self.assertListEqual(overlapped, [True, True])
+
+    @mock_session
+    def test_prefetch_shrunk(self, m):
+        self.setup_data(m)
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=2&size=4', status_code=404)
+        locales = list(self.client.locales.prefetch(depth=2))
+        self.assertListEqual([locale.id for locale in locales], range(1, 9))
+
+    @mock_session
+    def test_prefetch_iteration_error(self, m):
+        self.setup_data(m)
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=0&size=4', status_code=500)
+        it = iter(self.client.locales.prefetch(depth=2))
+        self.assertRaises(APIError, it.next)
+
+    @mock_session
+    def test_prefetch_slice(self, m):
+        self.setup_data(m)
+        it = iter(self.client.locales.prefetch(depth=2)[7:])
+        self.assertEqual(it.next(), Locale(8, 'hhh', 'HHH', 'xxx'))
+        self.assertEqual(it.next(), Locale(9, 'iii', 'III', 'xxx'))
+        self.assertEqual(it.next(), Locale(10, 'jjj', 'JJJ', 'xxx'))
+        self.assertRaises(StopIteration, it.next)
+
+    @mock_session
+    def test_parallel_iteration(self, m):
+        self.setup_data(m)
+        locales = list(self.client.locales.parallel_iter(workers=2))
+        self.assertListEqual([locale.id for locale in locales], range(1, 11))
+        self.assertEqual(locales[9], Locale(10, 'jjj', 'JJJ', 'xxx'))
+
+    @mock_session
+    def test_parallel_iteration_unordered(self, m):
+        self.setup_data(m)
+        locales = list(self.client.locales.parallel_iter(workers=2, ordered=False))
+        self.assertListEqual(sorted(locale.id for locale in locales), range(1, 11))
+
+    @mock_session
+    def test_parallel_iteration_drift(self, m):
+        self.setup_data(m)
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=2&size=4', text=json.dumps({
+            'content': [
+                {'id': 10, 'name': 'jjj', 'language': 'JJJ', 'country': 'xxx'},
+            ],
+            'page': {
+                'size': 1,
+                'totalElements': 9,
+                'totalPages': 3,
+                'number': 2,
+            }
+        }))
+        with self.assertRaises(PaginationDrift) as context:
+            list(self.client.locales.parallel_iter(workers=2))
+        self.assertEqual(context.exception.expected, 10)
+        self.assertEqual(context.exception.actual, 9)
+
+    @mock_session
+    def test_parallel_iteration_error(self, m):
+        self.setup_data(m)
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/?page=1&size=4', status_code=500)
+        self.assertRaises(APIError, list, self.client.locales.parallel_iter(workers=2))
+
+    def test_parallel_iteration_invalid_workers(self):
+        it = self.client.locales.parallel_iter(workers=0)
+        self.assertRaises(ValueError, it.next)
+
     @requests_mock.mock()
     def test_indexing(self, m):
         self.setup_data(m)
@@ -0,0 +1,71 @@
+import fcntl
+import os
+import shutil
+import tempfile
+import threading
+
+from lingo24.business_documents.locks import FileLock
+
+from .base import BaseTestCase
+
+
+class FileLockTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.lock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def flock(self, blocking=True):
+        # Takes the lock the way another process would.
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except IOError:
+            return False
+        finally:
+            os.close(fd)
+        return True
+
+    def test_context_manager(self):
+        lock = FileLock(self.path)
+        with lock:
+            self.assertTrue(os.path.exists(self.path))
+            self.assertFalse(self.flock(blocking=False))
+        other = FileLock(self.path)
+        self.assertTrue(other.acquire(blocking=False))
+        other.release()
+
+    def test_threads(self):
+        lock = FileLock(self.path)
+        results = []
+
+        def try_acquire():
+            results.append(lock.acquire(blocking=False))
+
+        with lock:
+            thread = threading.Thread(target=try_acquire)
+            thread.start()
+            thread.join()
+        self.assertListEqual(results, [False])
+
+    def test_reentrant(self):
+        lock = FileLock(self.path)
+        with lock:
+            with FileLock(self.path):
+                self.assertFalse(self.flock(blocking=False))
+            self.assertFalse(self.flock(blocking=False))
+        self.assertTrue(self.flock(blocking=False))
+
+    def test_threads_same_path(self):
+        results = []
+
+        def try_acquire():
+            results.append(FileLock(self.path).acquire(blocking=False))
+
+        with FileLock(self.path):
+            thread = threading.Thread(target=try_acquire)
+            thread.start()
+            thread.join()
+        self.assertListEqual(results, [False])
@@ -1,7 +1,12 @@
 import datetime
+import hashlib
 import json
+import os
+import shutil
+import tempfile
 from decimal import Decimal
 
+import requests
 import requests_mock
 
 from lingo24.business_documents import Authenticator, Client
@@ -12,7 +17,7 @@ from lingo24.business_documents.pricing import Charge, Price, TotalPrice
 from lingo24.business_documents.projects import Project, ProjectCollection
 from lingo24.exceptions import APIError, DoesNotExist, InvalidState
 
-from .base import BaseTestCase
+from .base import BaseTestCase, mock_session
 
 
 class ProjectTestCase(BaseTestCase):
@@ -75,6 +80,12 @@ class ProjectTestCase(BaseTestCase):
         project = Project(self.client, 1, 'aaa', 123, 'bbb', datetime.datetime.utcfromtimestamp(123), 'ccc')
         self.assertRaises(APIError, lambda: project.price)
 
+    @requests_mock.mock()
+    def test_price_timeout(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1/price', exc=requests.exceptions.ReadTimeout)
+        project = Project(self.client, 1, 'aaa', 123, 'bbb', datetime.datetime.utcfromtimestamp(123), 'ccc')
+        self.assertRaises(APIError, lambda: project.price)
+
     @requests_mock.mock()
     def test_refresh(self, m):
         m.get('https://api-demo.lingo24.com/docs/v1/projects/1', text=json.dumps({
@@ -1057,6 +1068,15 @@ class ProjectJobCollectionBasicTestCase(BaseTestCase):
     def test_item_url_path(self):
         self.assertEqual(self.project.jobs.item_url_path(123), 'projects/1/jobs/123')
 
+    def test_prefetch_related(self):
+        jobs = self.project.jobs.prefetch_related('service', 'target_file', workers=2)
+        self.assertTupleEqual(self.project.jobs.related, ())
+        self.assertTupleEqual(jobs.related, ('service', 'target_file'))
+        self.assertEqual(jobs.related_workers, 2)
+        self.assertTupleEqual(jobs.prefetch(2).related, ('service', 'target_file'))
+        self.assertRaises(ValueError, self.project.jobs.prefetch_related, 'xxx')
+        self.assertRaises(TypeError, self.project.jobs.prefetch_related, 'service', xxx=1)
+
     @requests_mock.mock()
     def test_get(self, m):
         m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs/123', text=json.dumps({
@@ -1336,3 +1356,193 @@ class ProjectJobCollectionDataTestCase(BaseTestCase):
         self.setup_data(m)
         it = iter(self.project.jobs.get_page(10))
         self.assertRaises(StopIteration, it.next)
+
+
+class ProjectJobCollectionPrefetchRelatedTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', per_page=4)
+        self.project = Project(self.client, 1, 'aaa', 123, 'bbb', datetime.datetime.utcfromtimestamp(123), 'ccc')
+
+    @staticmethod
+    def setup_data(m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs?page=0&size=4', text=json.dumps({
+            'content': [
+                {'id': 1, 'jobStatus': 'aaa', 'serviceId': 11, 'sourceLocaleId': 12, 'targetLocaleId': 13, 'sourceFileId': 14, 'targetFileId': 15},
+                {'id': 2, 'jobStatus': 'bbb', 'serviceId': 11, 'sourceLocaleId': 12, 'targetLocaleId': 23, 'sourceFileId': 24, 'targetFileId': None},
+                {'id': 3, 'jobStatus': 'ccc', 'serviceId': 11, 'sourceLocaleId': 13, 'targetLocaleId': 12, 'sourceFileId': 34, 'targetFileId': 35},
+            ],
+            'page': {
+                'size': 3,
+                'totalElements': 3,
+                'totalPages': 1,
+                'number': 0,
+            }
+        }))
+        m.get('https://api-demo.lingo24.com/docs/v1/services/11', text=json.dumps({
+            'id': 11,
+            'name': 'xxx',
+            'description': 'yyy',
+        }))
+        for locale_id in (12, 13):
+            m.get('https://api-demo.lingo24.com/docs/v1/locales/{}'.format(locale_id), text=json.dumps({
+                'id': locale_id,
+                'name': 'xxx',
+                'language': 'XXX',
+                'country': 'xxx',
+            }))
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/23', status_code=404)
+        m.get('https://api-demo.lingo24.com/docs/v1/files/15', text=json.dumps({
+            'id': 15,
+            'name': 'Test.txt',
+            'type': 'TARGET',
+        }))
+        m.get('https://api-demo.lingo24.com/docs/v1/files/35', text=json.dumps({
+            'id': 35,
+            'name': 'Test2.txt',
+            'type': 'TARGET',
+        }))
+
+    @mock_session
+    def test_prefetch_related(self, m):
+        self.setup_data(m)
+        jobs = list(self.project.jobs.prefetch_related('service', 'source_locale', 'target_file'))
+        self.assertEqual(len([r for r in m.request_history if '/jobs' not in r.url]), 5)
+        call_count = m.call_count
+        self.assertEqual(jobs[0].service.name, 'xxx')
+        self.assertIs(jobs[1].service, jobs[0].service)
+        self.assertEqual(jobs[2].source_locale.id, 13)
+        self.assertEqual(jobs[0].target_file, File(self.client, 15, 'Test.txt', 'TARGET'))
+        self.assertIsNone(jobs[1].target_file)
+        self.assertEqual(m.call_count, call_count)
+
+    @mock_session
+    def test_prefetch_related_missing(self, m):
+        self.setup_data(m)
+        jobs = list(self.project.jobs.prefetch_related('target_locale'))
+        self.assertEqual(len([r for r in m.request_history if '/jobs' not in r.url]), 3)
+        self.assertEqual(jobs[0].target_locale.id, 13)
+        self.assertRaises(DoesNotExist, lambda: jobs[1].target_locale)
+
+    @mock_session
+    def test_no_prefetch_related(self, m):
+        self.setup_data(m)
+        jobs = list(self.project.jobs)
+        call_count = m.call_count
+        self.assertTrue(all('/jobs' in r.url for r in m.request_history))
+        jobs[0].service
+        self.assertEqual(m.call_count, call_count + 1)
+
+
+class ProjectDownloadTargetsTestCase(BaseTestCase):
+    def setUp(self):
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        self.client = Client(authenticator, 'demo', per_page=4)
+        self.project = Project(self.client, 1, 'aaa', 123, 'bbb', datetime.datetime.utcfromtimestamp(123), 'ccc')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def setup_data(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/projects/1/jobs?page=0&size=4', text=json.dumps({
+            'content': [
+                {'id': 1, 'jobStatus': 'TRANSLATED', 'serviceId': 11, 'sourceLocaleId': 12, 'targetLocaleId': 13, 'sourceFileId': 14, 'targetFileId': 15},
+                {'id': 2, 'jobStatus': 'NEW', 'serviceId': 11, 'sourceLocaleId': 12, 'targetLocaleId': 13, 'sourceFileId': 24, 'targetFileId': None},
+                {'id': 3, 'jobStatus': 'TRANSLATED', 'serviceId': 11, 'sourceLocaleId': 13, 'targetLocaleId': 12, 'sourceFileId': 34, 'targetFileId': 35},
+                {'id': 4, 'jobStatus': 'TRANSLATED', 'serviceId': 11, 'sourceLocaleId': 12, 'targetLocaleId': 13, 'sourceFileId': 44, 'targetFileId': 45},
+            ],
+            'page': {
+                'size': 4,
+                'totalElements': 4,
+                'totalPages': 1,
+                'number': 0,
+            }
+        }))
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/12', text=json.dumps({
+            'id': 12,
+            'name': 'English (UK)',
+            'language': 'en',
+            'country': 'GB',
+        }))
+        m.get('https://api-demo.lingo24.com/docs/v1/locales/13', text=json.dumps({
+            'id': 13,
+            'name': 'French',
+            'language': 'fr',
+            'country': '',
+        }))
+        for file_id, name in ((15, 'Test.txt'), (35, 'Test.txt'), (45, 'Test.txt')):
+            m.get('https://api-demo.lingo24.com/docs/v1/files/{}'.format(file_id), text=json.dumps({
+                'id': file_id,
+                'name': name,
+                'type': 'TARGET',
+            }))
+            m.get('https://api-demo.lingo24.com/docs/v1/files/{}/content'.format(file_id), text='content {}'.format(file_id))
+
+    def content_requests(self, m):
+        return [r.url for r in m.request_history if r.url.endswith('/content')]
+
+    def read(self, *parts):
+        with open(os.path.join(self.directory, *parts), 'rb') as f:
+            return f.read()
+
+    @mock_session
+    def test_download_targets(self, m):
+        self.setup_data(m)
+        result = self.project.download_targets(self.directory, workers=2)
+        self.assertListEqual(result.errors, [])
+        self.assertListEqual(result.skipped, [])
+        self.assertItemsEqual(result.downloaded, [
+            os.path.join(self.directory, 'fr', 'Test.txt'),
+            os.path.join(self.directory, 'fr', '45-Test.txt'),
+            os.path.join(self.directory, 'en_GB', 'Test.txt'),
+        ])
+        self.assertEqual(self.read('fr', 'Test.txt'), 'content 15')
+        self.assertEqual(self.read('fr', '45-Test.txt'), 'content 45')
+        self.assertEqual(self.read('en_GB', 'Test.txt'), 'content 35')
+        manifest = json.loads(self.read('.lingo24-manifest.json'))
+        self.assertDictEqual(manifest[os.path.join('fr', 'Test.txt')], {
+            'id': 15,
+            'size': 10,
+            'sha256': hashlib.sha256('content 15').hexdigest(),
+        })
+        self.assertEqual(len(self.content_requests(m)), 3)
+
+    @mock_session
+    def test_download_targets_skips_existing(self, m):
+        self.setup_data(m)
+        self.project.download_targets(self.directory)
+        result = self.project.download_targets(self.directory)
+        self.assertListEqual(result.downloaded, [])
+        self.assertEqual(len(result.skipped), 3)
+        self.assertEqual(len(self.content_requests(m)), 3)
+
+    @mock_session
+    def test_download_targets_replaces_changed(self, m):
+        self.setup_data(m)
+        self.project.download_targets(self.directory)
+        with open(os.path.join(self.directory, 'fr', 'Test.txt'), 'wb') as f:
+            f.write('changed')
+        # Same size, different content; only noticed when verifying.
+        with open(os.path.join(self.directory, 'en_GB', 'Test.txt'), 'wb') as f:
+            f.write('CONTENT 35')
+        result = self.project.download_targets(self.directory)
+        self.assertListEqual(result.downloaded, [os.path.join(self.directory, 'fr', 'Test.txt')])
+        self.assertEqual(self.read('fr', 'Test.txt'), 'content 15')
+        self.assertEqual(self.read('en_GB', 'Test.txt'), 'CONTENT 35')
+        result = self.project.download_targets(self.directory, verify=True)
+        self.assertListEqual(result.downloaded, [os.path.join(self.directory, 'en_GB', 'Test.txt')])
+        self.assertEqual(self.read('en_GB', 'Test.txt'), 'content 35')
+
+    @mock_session
+    def test_download_targets_errors(self, m):
+        self.setup_data(m)
+        m.get('https://api-demo.lingo24.com/docs/v1/files/35/content', status_code=404)
+        m.get('https://api-demo.lingo24.com/docs/v1/files/45', status_code=500)
+        result = self.project.download_targets(self.directory)
+        self.assertListEqual(result.downloaded, [os.path.join(self.directory, 'fr', 'Test.txt')])
+        self.assertListEqual(sorted(job.id for job, _ in result.errors), [3, 4])
+        errors = dict((job.id, error) for job, error in result.errors)
+        self.assertIsInstance(errors[3], DoesNotExist)
+        self.assertIsInstance(errors[4], APIError)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'en_GB', 'Test.txt')))
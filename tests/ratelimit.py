@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+
+import requests_mock
+from mock import Mock, patch
+
+from lingo24.business_documents import (
+    Authenticator,
+    Client,
+    FileTokenBucket,
+    TokenBucket,
+    )
+
+from .base import BaseTestCase
+
+
+class TokenBucketTestCase(BaseTestCase):
+    def setUp(self):
+        patcher = patch('time.time')
+        self.time = patcher.start()
+        self.time.return_value = 10000
+        self.addCleanup(patcher.stop)
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+
+    def test_invalid_capacity(self):
+        self.assertRaises(ValueError, TokenBucket, rate=5, capacity=0.5)
+        self.assertRaises(ValueError, TokenBucket, rate=5, capacity=0)
+
+    def test_acquire_more_than_capacity(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        self.assertRaises(ValueError, bucket.acquire, 4)
+
+    def test_burst(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        self.assertEqual(bucket._try_acquire(1), 0)
+        self.assertEqual(bucket._try_acquire(1), 0)
+        self.assertEqual(bucket._try_acquire(1), 0)
+        self.assertEqual(bucket._try_acquire(1), 0.5)
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        self.assertEqual(bucket._try_acquire(2), 0)
+        self.time.return_value = 10000.25
+        self.assertEqual(bucket._try_acquire(1), 0.25)
+        self.time.return_value = 10001
+        self.assertEqual(bucket._try_acquire(2), 0)
+
+    @patch('time.sleep')
+    def test_acquire_waits(self, sleep):
+        bucket = TokenBucket(rate=4, capacity=1)
+        bucket.acquire()
+
+        def advance(seconds):
+            self.time.return_value += seconds
+
+        sleep.side_effect = advance
+        bucket.acquire()
+        sleep.assert_called_once_with(0.25)
+
+
+class FileTokenBucketTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'bucket')
+        patcher = patch('time.time')
+        self.time = patcher.start()
+        self.time.return_value = 10000
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_state(self):
+        first = FileTokenBucket(self.path, rate=1, capacity=2)
+        second = FileTokenBucket(self.path, rate=1, capacity=2)
+        self.assertEqual(first._try_acquire(1), 0)
+        self.assertEqual(second._try_acquire(1), 0)
+        self.assertEqual(first._try_acquire(1), 1)
+        with open(self.path, 'rb') as f:
+            self.assertDictEqual(json.load(f), {'tokens': 0, 'updated': 10000})
+
+    def test_corrupt_state(self):
+        with open(self.path, 'wb') as f:
+            f.write('xxx')
+        bucket = FileTokenBucket(self.path, rate=1, capacity=1)
+        self.assertEqual(bucket._try_acquire(1), 0)
+
+
+class ClientRateLimitTestCase(BaseTestCase):
+    @requests_mock.mock()
+    def test_rate_limiter(self, m):
+        m.get('https://api-demo.lingo24.com/docs/v1/foo', text='{}')
+        authenticator = Authenticator('xxx', 'yyy', 'https://www.example.com/callback')
+        authenticator.store.set({'access_token': 'aaa'})
+        rate_limiter = Mock()
+        client = Client(authenticator, 'demo', rate_limiter=rate_limiter)
+        client.api_get('foo')
+        client.api_get('foo')
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
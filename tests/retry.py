@@ -0,0 +1,67 @@
+from mock import Mock, patch
+
+from lingo24.business_documents import RetryPolicy
+
+from .base import BaseTestCase
+
+
+mock_time = Mock()
+mock_time.return_value = 946684800  # Sat, 1 Jan 2000 00:00:00 GMT
+
+
+def make_response(status_code, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class RetryPolicyTestCase(BaseTestCase):
+    def test_allows_method(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.allows_method('get'))
+        self.assertTrue(policy.allows_method('PUT'))
+        self.assertTrue(policy.allows_method('delete'))
+        self.assertFalse(policy.allows_method('post'))
+        self.assertTrue(RetryPolicy(retry_post=True).allows_method('post'))
+
+    def test_is_retryable_response(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.is_retryable_response(make_response(429)))
+        self.assertTrue(policy.is_retryable_response(make_response(503)))
+        self.assertFalse(policy.is_retryable_response(make_response(500)))
+        self.assertFalse(policy.is_retryable_response(make_response(404)))
+        self.assertTrue(RetryPolicy(status_codes=(500,)).is_retryable_response(make_response(500)))
+
+    @patch('random.uniform')
+    def test_backoff(self, uniform):
+        uniform.side_effect = lambda low, high: high
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        self.assertEqual(policy.backoff(0), 1)
+        self.assertEqual(policy.backoff(1), 2)
+        self.assertEqual(policy.backoff(2), 4)
+        self.assertEqual(policy.backoff(3), 5)
+        uniform.assert_called_with(0, 5)
+
+    @patch('time.time', mock_time)
+    def test_retry_after(self):
+        policy = RetryPolicy()
+        self.assertIsNone(policy.retry_after(make_response(503)))
+        self.assertEqual(policy.retry_after(make_response(503, {'Retry-After': '7'})), 7)
+        self.assertEqual(policy.retry_after(make_response(503, {'Retry-After': 'Sat, 1 Jan 2000 00:00:12 GMT'})), 12)
+        self.assertEqual(policy.retry_after(make_response(503, {'Retry-After': 'Fri, 31 Dec 1999 00:00:00 GMT'})), 0)
+        self.assertIsNone(policy.retry_after(make_response(503, {'Retry-After': 'soon'})))
+
+    @patch('time.time', mock_time)
+    def test_next_delay(self):
+        policy = RetryPolicy(max_retries=2, max_total_time=10)
+        started = mock_time.return_value
+        self.assertEqual(policy.next_delay(0, started, make_response(429, {'Retry-After': '3'})), 3)
+        self.assertLessEqual(policy.next_delay(1, started), 1)
+        self.assertIsNone(policy.next_delay(2, started))
+        self.assertIsNone(policy.next_delay(0, started, make_response(429, {'Retry-After': '11'})))
+        self.assertIsNone(policy.next_delay(0, started - 10))
+
+    def test_next_delay_ignore_retry_after(self):
+        policy = RetryPolicy(backoff_factor=0, respect_retry_after=False)
+        self.assertEqual(policy.next_delay(0, 0, make_response(429, {'Retry-After': '3'})), 0)
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from mock import Mock
+
+from lingo24.business_documents.singleflight import SingleFlight
+
+from .base import BaseTestCase
+
+
+class SingleFlightTestCase(BaseTestCase):
+    def run_concurrently(self, single_flight, key, func, count=5):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(single_flight.do(key, func))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_do(self):
+        single_flight = SingleFlight()
+        self.assertEqual(single_flight.do('a', lambda: 1), 1)
+        self.assertEqual(single_flight.do('a', lambda: 2), 2)
+        self.assertDictEqual(single_flight._calls, {})
+
+    def test_concurrent_calls_shared(self):
+        single_flight = SingleFlight()
+
+        def slow():
+            time.sleep(0.1)
+            return object()
+
+        func = Mock(side_effect=slow)
+        results, errors = self.run_concurrently(single_flight, 'a', func)
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertListEqual(errors, [])
+
+    def test_concurrent_errors_shared(self):
+        single_flight = SingleFlight()
+
+        def slow():
+            time.sleep(0.1)
+            raise ValueError('xxx')
+
+        func = Mock(side_effect=slow)
+        results, errors = self.run_concurrently(single_flight, 'a', func)
+        self.assertEqual(func.call_count, 1)
+        self.assertListEqual(results, [])
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+        self.assertDictEqual(single_flight._calls, {})
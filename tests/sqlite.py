@@ -0,0 +1,36 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from lingo24.business_documents.sqlite import connect_sqlite
+
+from .base import BaseTestCase
+
+
+class ConnectSQLiteTestCase(BaseTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'test.db')
+
+    def test_wal_mode(self):
+        connect_sqlite(self.path).close()
+        connection = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        finally:
+            connection.close()
+
+    def test_autocommit(self):
+        connection = connect_sqlite(self.path, timeout=5)
+        try:
+            connection.execute('CREATE TABLE test (value INTEGER)')
+            connection.execute('INSERT INTO test VALUES (1)')
+        finally:
+            connection.close()
+        connection = sqlite3.connect(self.path)
+        try:
+            self.assertEqual(connection.execute('SELECT value FROM test').fetchone()[0], 1)
+        finally:
+            connection.close()